@@ -236,7 +236,7 @@ def _update_session(session_id: str, user_message: str, assistant_answer: str, c
             SessionTurn(role="assistant", text=assistant_answer),
         ]
     )
-    state.retrieval_cache[user_message] = [int(c.split(":")[1]) for c in citations]
+    state.remember_retrieval(user_message, [int(c.split(":")[1]) for c in citations])
     session_store.upsert(session_id, state)
 
 
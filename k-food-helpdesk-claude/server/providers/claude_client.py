@@ -1,4 +1,5 @@
 import asyncio
+import functools
 import logging
 from dataclasses import dataclass
 from typing import Any, AsyncIterator
@@ -16,6 +17,12 @@ class ClaudeResponse:
     output_tokens: int | None
 
 
+@functools.lru_cache(maxsize=64)
+def _dedup_models(primary: str, fallback: str, extras: tuple[str, ...]) -> tuple[str, ...]:
+    # Keep deterministic order while deduplicating.
+    return tuple(dict.fromkeys(m.strip() for m in (primary, fallback, *extras) if m and m.strip()))
+
+
 class ClaudeClient:
     """Wrapper around Anthropic Messages API with deterministic model fallback."""
 
@@ -32,9 +39,7 @@ class ClaudeClient:
         self._api_key = api_key
         self._client = AsyncAnthropic(api_key=api_key)
         self._sync_client = Anthropic(api_key=api_key)
-        ordered = [primary_model, fallback_model] + (extra_models or [])
-        # Keep deterministic order while deduplicating.
-        self._configured_models = list(dict.fromkeys([m.strip() for m in ordered if m and m.strip()]))
+        self._configured_models = list(_dedup_models(primary_model, fallback_model, tuple(extra_models or ())))
         self._models = list(self._configured_models)
         self._available_models: list[str] = []
         self._selected_primary = self._models[0] if self._models else ""
@@ -1,5 +1,5 @@
 import json
-from dataclasses import asdict, dataclass
+from dataclasses import dataclass, replace
 
 from server.rag.retriever import RetrievedDoc
 
@@ -35,14 +35,7 @@ def build_retrieval_context(
         if size + len(candidate_json) > max_chars:
             break
         payload.append(doc_payload)
-        included.append(
-            RetrievedDoc(
-                **{
-                    **asdict(doc),
-                    "content_snippet": doc_payload["content_snippet"],
-                }
-            )
-        )
+        included.append(replace(doc, content_snippet=doc_payload["content_snippet"]))
         size += len(candidate_json)
 
     context = json.dumps(payload, ensure_ascii=False, indent=2)
@@ -1,24 +1,108 @@
 import json
 import os
-import time
+import socket
+from collections import OrderedDict
 from dataclasses import dataclass, field
-from threading import Lock
-from typing import Protocol
+from threading import Lock, local
+from typing import Any, Protocol
 
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
 
-@dataclass
+
+def _dumps(payload: dict[str, Any]) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload).encode("utf-8")
+
+
+def _loads(raw: bytes) -> dict[str, Any]:
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+# msgpack payloads live under a versioned prefix so they never collide with JSON entries.
+_KEY_PREFIXES = {"json": "kfh:session:", "msgpack": "kfh:session:v2:"}
+
+# One-byte format tag in front of msgpack payloads. Bare msgpack maps start at 0x80,
+# so untagged entries written before compression was added still decode.
+_FORMAT_MSGPACK_ZSTD = b"\x01"
+ZSTD_LEVEL = 3
+
+_REDIS_POOLS: dict[str, Any] = {}
+_REDIS_POOLS_LOCK = Lock()
+
+
+def _keepalive_options() -> dict[int, int]:
+    options = {"TCP_KEEPIDLE": 60, "TCP_KEEPINTVL": 10, "TCP_KEEPCNT": 3}
+    return {getattr(socket, name): value for name, value in options.items() if hasattr(socket, name)}
+
+
+def _shared_redis_pool(redis_url: str) -> Any:
+    """One blocking connection pool per Redis URL, shared by every store in the process."""
+    import redis
+
+    with _REDIS_POOLS_LOCK:
+        pool = _REDIS_POOLS.get(redis_url)
+        if pool is None:
+            pool = redis.BlockingConnectionPool.from_url(
+                redis_url,
+                max_connections=int(os.getenv("REDIS_POOL_SIZE", "64")),
+                timeout=1.0,
+                socket_keepalive=True,
+                socket_keepalive_options=_keepalive_options(),
+            )
+            _REDIS_POOLS[redis_url] = pool
+        return pool
+
+
+@dataclass(slots=True)
 class SessionTurn:
     role: str
     text: str
-    ts: float = field(default_factory=time.time)
 
 
-@dataclass
+RETRIEVAL_CACHE_MAX = 64
+RETRIEVAL_POOL_MAX = 4096
+
+# Popular queries recur across sessions; intern their (query, doc_ids) pairs so every
+# session holding the same entry shares one string and one tuple.
+_RETRIEVAL_POOL: OrderedDict[str, tuple[str, tuple[int, ...]]] = OrderedDict()
+_RETRIEVAL_POOL_LOCK = Lock()
+
+
+def _pool_intern(query: str, doc_ids: list[int] | tuple[int, ...]) -> tuple[str, tuple[int, ...]]:
+    ids = tuple(doc_ids)
+    with _RETRIEVAL_POOL_LOCK:
+        pooled = _RETRIEVAL_POOL.get(query)
+        if pooled is not None and pooled[1] == ids:
+            _RETRIEVAL_POOL.move_to_end(query)
+            return pooled
+        pooled = (query, ids)
+        _RETRIEVAL_POOL[query] = pooled
+        _RETRIEVAL_POOL.move_to_end(query)
+        while len(_RETRIEVAL_POOL) > RETRIEVAL_POOL_MAX:
+            _RETRIEVAL_POOL.popitem(last=False)
+        return pooled
+
+
+@dataclass(slots=True)
 class SessionState:
     turns: list[SessionTurn] = field(default_factory=list)
-    retrieval_cache: dict[str, list[int]] = field(default_factory=dict)
+    retrieval_cache: OrderedDict[str, tuple[int, ...]] = field(default_factory=OrderedDict)
     target_language: str | None = None
 
+    def remember_retrieval(self, query: str, doc_ids: list[int] | tuple[int, ...]) -> None:
+        """Record cited doc ids for a query, evicting the least recently used entries past the cap."""
+        query, ids = _pool_intern(query, doc_ids)
+        self.retrieval_cache[query] = ids
+        self.retrieval_cache.move_to_end(query)
+        while len(self.retrieval_cache) > RETRIEVAL_CACHE_MAX:
+            self.retrieval_cache.popitem(last=False)
+
 
 class SessionStore(Protocol):
     def get(self, session_id: str) -> SessionState:
@@ -29,55 +113,109 @@ class SessionStore(Protocol):
 
 
 class InMemorySessionStore:
+    _SHARD_COUNT = 64  # power of two so shard selection is a mask
+
     def __init__(self, max_turns: int = 20) -> None:
         self._max_turns = max_turns
-        self._lock = Lock()
-        self._sessions: dict[str, SessionState] = {}
+        # Lock striping: unrelated sessions never contend on the same lock.
+        self._shards: list[tuple[Lock, dict[str, SessionState]]] = [
+            (Lock(), {}) for _ in range(self._SHARD_COUNT)
+        ]
+
+    def _shard(self, session_id: str) -> tuple[Lock, dict[str, SessionState]]:
+        return self._shards[hash(session_id) & (self._SHARD_COUNT - 1)]
 
     def get(self, session_id: str) -> SessionState:
-        with self._lock:
-            return self._sessions.get(session_id, SessionState())
+        lock, sessions = self._shard(session_id)
+        with lock:
+            return sessions.get(session_id, SessionState())
 
     def upsert(self, session_id: str, state: SessionState) -> None:
         state.turns = state.turns[-self._max_turns :]
-        with self._lock:
-            self._sessions[session_id] = state
+        lock, sessions = self._shard(session_id)
+        with lock:
+            sessions[session_id] = state
 
 
 class RedisSessionStore:
     """Stubbed Redis-backed session store interface for production deployments."""
 
-    def __init__(self, redis_url: str, max_turns: int = 20) -> None:
+    def __init__(self, redis_url: str, max_turns: int = 20, serializer: str = "msgpack") -> None:
         import redis
 
+        if serializer not in _KEY_PREFIXES:
+            raise ValueError(f"Unsupported session serializer: {serializer}")
+        if serializer == "msgpack":
+            import msgpack
+            import zstandard
+
+            self._msgpack = msgpack
+            self._zstd = zstandard
+            # zstd contexts are not safe to share between threads; keep one pair per thread.
+            self._zstd_local = local()
+            self._dumps = self._dumps_msgpack_zstd
+            self._loads = self._loads_msgpack_zstd
+        else:
+            self._dumps = _dumps
+            self._loads = _loads
+        self._key_prefix = _KEY_PREFIXES[serializer]
         self._max_turns = max_turns
-        self._redis = redis.from_url(redis_url, decode_responses=True)
+        self._redis = redis.Redis(connection_pool=_shared_redis_pool(redis_url))
         self._ttl_seconds = 60 * 60 * 24
 
     def get(self, session_id: str) -> SessionState:
-        raw = self._redis.get(self._key(session_id))
+        return self._decode(self._redis.get(self._key(session_id)))
+
+    def upsert(self, session_id: str, state: SessionState) -> None:
+        self._redis.setex(self._key(session_id), self._ttl_seconds, self._encode(state))
+
+    def _decode(self, raw: bytes | None) -> SessionState:
         if not raw:
             return SessionState()
-        data = json.loads(raw)
-        turns = [SessionTurn(**t) for t in data.get("turns", [])]
+        data = self._loads(raw)
+        # Older payloads also carry a per-turn "ts"; nothing reads it, so it is ignored.
+        turns = [SessionTurn(role=t["role"], text=t["text"]) for t in data.get("turns", [])]
+        cached = data.get("retrieval_cache") or []
+        # Entries are stored as [query, doc_ids] pairs to keep LRU order across round-trips.
+        pairs = cached.items() if isinstance(cached, dict) else cached
         return SessionState(
             turns=turns[-self._max_turns :],
-            retrieval_cache=data.get("retrieval_cache", {}),
+            retrieval_cache=OrderedDict(_pool_intern(query, doc_ids) for query, doc_ids in pairs),
             target_language=data.get("target_language"),
         )
 
-    def upsert(self, session_id: str, state: SessionState) -> None:
+    def _encode(self, state: SessionState) -> bytes:
         state.turns = state.turns[-self._max_turns :]
         payload = {
-            "turns": [t.__dict__ for t in state.turns],
-            "retrieval_cache": state.retrieval_cache,
+            "turns": [{"role": t.role, "text": t.text} for t in state.turns],
+            "retrieval_cache": [[query, doc_ids] for query, doc_ids in state.retrieval_cache.items()],
             "target_language": state.target_language,
         }
-        self._redis.setex(self._key(session_id), self._ttl_seconds, json.dumps(payload))
+        return self._dumps(payload)
+
+    def _zstd_contexts(self) -> tuple[Any, Any]:
+        contexts = getattr(self._zstd_local, "contexts", None)
+        if contexts is None:
+            contexts = (
+                self._zstd.ZstdCompressor(level=ZSTD_LEVEL),
+                self._zstd.ZstdDecompressor(),
+            )
+            self._zstd_local.contexts = contexts
+        return contexts
+
+    def _dumps_msgpack_zstd(self, payload: dict[str, Any]) -> bytes:
+        compressor, _ = self._zstd_contexts()
+        packed = self._msgpack.packb(payload, use_bin_type=True)
+        return _FORMAT_MSGPACK_ZSTD + compressor.compress(packed)
+
+    def _loads_msgpack_zstd(self, raw: bytes) -> dict[str, Any]:
+        if raw[:1] == _FORMAT_MSGPACK_ZSTD:
+            _, decompressor = self._zstd_contexts()
+            raw = decompressor.decompress(raw[1:])
+        return self._msgpack.unpackb(raw, raw=False)
 
-    @staticmethod
-    def _key(session_id: str) -> str:
-        return f"kfh:session:{session_id}"
+    def _key(self, session_id: str) -> str:
+        return f"{self._key_prefix}{session_id}"
 
 
 def build_session_store() -> SessionStore:
@@ -85,5 +223,6 @@ def build_session_store() -> SessionStore:
     backend = os.getenv("SESSION_STORE_BACKEND", "memory").lower()
     if backend == "redis":
         redis_url = os.getenv("REDIS_URL", "redis://redis:6379/0")
-        return RedisSessionStore(redis_url=redis_url, max_turns=max_turns)
+        serializer = os.getenv("SESSION_SERIALIZER", "msgpack").lower()
+        return RedisSessionStore(redis_url=redis_url, max_turns=max_turns, serializer=serializer)
     return InMemorySessionStore(max_turns=max_turns)
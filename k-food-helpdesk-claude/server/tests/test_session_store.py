@@ -0,0 +1,147 @@
+import json
+import threading
+
+import msgpack
+import pytest
+import zstandard
+
+from server.session_store import (
+    RETRIEVAL_CACHE_MAX,
+    InMemorySessionStore,
+    RedisSessionStore,
+    SessionState,
+    SessionTurn,
+)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def setex(self, key, ttl, value):
+        self.data[key] = value
+        self.ttls[key] = ttl
+
+
+@pytest.fixture
+def fake_redis(monkeypatch):
+    fake = FakeRedis()
+    monkeypatch.setattr("redis.Redis", lambda connection_pool: fake)
+    return fake
+
+
+def _sample_state():
+    state = SessionState(target_language="ko")
+    state.turns.extend(SessionTurn(role="user", text=f"질문 {i}") for i in range(3))
+    state.remember_retrieval("refund policy", [3, 7])
+    state.remember_retrieval("delivery time", [1])
+    return state
+
+
+def test_retrieval_cache_evicts_least_recently_used():
+    state = SessionState()
+    for i in range(RETRIEVAL_CACHE_MAX):
+        state.remember_retrieval(f"q{i}", [i])
+    state.remember_retrieval("q0", [0])
+    state.remember_retrieval("new", [99])
+
+    assert len(state.retrieval_cache) == RETRIEVAL_CACHE_MAX
+    assert "q1" not in state.retrieval_cache
+    assert list(state.retrieval_cache)[-2:] == ["q0", "new"]
+
+
+def test_retrieval_cache_entries_are_shared_across_sessions():
+    first, second = SessionState(), SessionState()
+    first.remember_retrieval("refund policy", [3, 7])
+    second.remember_retrieval("refund policy", [3, 7])
+
+    assert first.retrieval_cache["refund policy"] == (3, 7)
+    assert first.retrieval_cache["refund policy"] is second.retrieval_cache["refund policy"]
+
+
+def test_in_memory_store_round_trip_trims_turns():
+    store = InMemorySessionStore(max_turns=2)
+    state = store.get("s1")
+    state.turns.extend(SessionTurn(role="user", text=str(i)) for i in range(3))
+    state.target_language = "ko"
+    store.upsert("s1", state)
+
+    stored = store.get("s1")
+    assert [t.text for t in stored.turns] == ["1", "2"]
+    assert stored.target_language == "ko"
+    assert store.get("other").target_language is None
+
+
+@pytest.mark.parametrize(
+    ("serializer", "prefix"),
+    [("msgpack", "kfh:session:v2:"), ("json", "kfh:session:")],
+)
+def test_redis_store_round_trip(fake_redis, serializer, prefix):
+    store = RedisSessionStore("redis://localhost:6379/0", max_turns=2, serializer=serializer)
+    store.upsert("s1", _sample_state())
+
+    assert list(fake_redis.data) == [f"{prefix}s1"]
+    stored = store.get("s1")
+    assert [(t.role, t.text) for t in stored.turns] == [("user", "질문 1"), ("user", "질문 2")]
+    assert list(stored.retrieval_cache.items()) == [("refund policy", (3, 7)), ("delivery time", (1,))]
+    assert stored.target_language == "ko"
+    assert store.get("missing").turns == []
+
+
+def test_redis_store_msgpack_payload_is_tagged_and_compressed(fake_redis):
+    store = RedisSessionStore("redis://localhost:6379/0", serializer="msgpack")
+    store.upsert("s1", _sample_state())
+
+    raw = fake_redis.data["kfh:session:v2:s1"]
+    assert raw[:1] == b"\x01"
+    payload = msgpack.unpackb(zstandard.ZstdDecompressor().decompress(raw[1:]), raw=False)
+    assert payload["target_language"] == "ko"
+    assert payload["retrieval_cache"] == [["refund policy", [3, 7]], ["delivery time", [1]]]
+
+
+def test_redis_store_reads_untagged_msgpack(fake_redis):
+    store = RedisSessionStore("redis://localhost:6379/0", serializer="msgpack")
+    payload = {"turns": [{"role": "user", "text": "hi"}], "retrieval_cache": [], "target_language": "en"}
+    fake_redis.data["kfh:session:v2:s1"] = msgpack.packb(payload, use_bin_type=True)
+
+    stored = store.get("s1")
+    assert [t.text for t in stored.turns] == ["hi"]
+    assert stored.target_language == "en"
+
+
+def test_redis_store_reads_legacy_json_payload(fake_redis):
+    store = RedisSessionStore("redis://localhost:6379/0", serializer="json")
+    legacy = {
+        "turns": [{"role": "user", "text": "환불", "ts": 1700000000.5}, {"role": "assistant", "text": "ok", "ts": 1700000001.0}],
+        "retrieval_cache": {"refund policy": [3, 7]},
+        "target_language": "ko",
+    }
+    fake_redis.data["kfh:session:s1"] = json.dumps(legacy).encode("utf-8")
+
+    stored = store.get("s1")
+    assert [(t.role, t.text) for t in stored.turns] == [("user", "환불"), ("assistant", "ok")]
+    assert stored.retrieval_cache == {"refund policy": (3, 7)}
+    assert stored.target_language == "ko"
+
+
+def test_redis_store_msgpack_round_trips_across_threads(fake_redis):
+    store = RedisSessionStore("redis://localhost:6379/0", serializer="msgpack")
+    store.upsert("s1", _sample_state())
+    main_contexts = store._zstd_contexts()
+    seen = {}
+
+    def worker():
+        seen["state"] = store.get("s1")
+        seen["contexts"] = store._zstd_contexts()
+
+    thread = threading.Thread(target=worker)
+    thread.start()
+    thread.join()
+
+    assert seen["state"].target_language == "ko"
+    assert seen["contexts"][0] is not main_contexts[0]
+    assert seen["contexts"][1] is not main_contexts[1]
@@ -1,17 +1,38 @@
+import asyncio
 import json
 import re
 from dataclasses import dataclass
 from typing import Any, Callable
 
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj: Any) -> str:
+        # orjson emits UTF-8 without escaping non-ASCII, matching ensure_ascii=False.
+        return orjson.dumps(obj).decode("utf-8")
+
+except ImportError:  # pragma: no cover - optional speedup
+    _json_loads = json.loads
+
+    def _json_dumps(obj: Any) -> str:
+        return json.dumps(obj, ensure_ascii=False)
+
 try:
     from config import settings
-    from tools.registry import available_tools_for_query, execute_tool_with_timeout
+    from tools.registry import available_tools_for_query, execute_tools
 except ImportError:  # pragma: no cover - fallback for package imports in tests/evals
     from app.config import settings
-    from app.tools.registry import available_tools_for_query, execute_tool_with_timeout
+    from app.tools.registry import available_tools_for_query, execute_tools
 
 
 STRUCTURED_KEYS = ["answer", "steps", "examples", "common_mistakes", "next_exercises"]
+_REQUIRED = frozenset(STRUCTURED_KEYS)
+
+_FENCE_ANY = re.compile(r"```(?:json)?", re.IGNORECASE)
+_MATH_RE = re.compile(r"\d+\s*[\+\-\*/\^]\s*\d+")
+_IMG_RE = re.compile(r"this image|in the image|picture|사진|이미지|첨부된", re.IGNORECASE)
 
 
 @dataclass
@@ -43,47 +64,171 @@ def build_structured_system_prompt(target_language: str, translator_mode: bool)
     )
 
 
-def parse_structured_json(text: str) -> dict[str, Any] | None:
-    raw = (text or "").strip()
-    if not raw:
-        return None
-    # Strip common markdown wrappers from model output.
-    raw = re.sub(r"^```(?:json)?\s*", "", raw, flags=re.IGNORECASE)
-    raw = re.sub(r"\s*```$", "", raw)
+_RAW_DECODER = json.JSONDecoder()
+
+
+def _extract_first_object(raw: str) -> Any | None:
     start = raw.find("{")
     if start < 0:
         return None
-    # Extract first balanced JSON object only.
-    depth = 0
-    end = -1
-    for idx in range(start, len(raw)):
-        ch = raw[idx]
-        if ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                end = idx
-                break
-    if end <= start:
-        return None
+    # Decode the first JSON value starting at the brace (C scanner), ignoring whatever trails it.
     try:
-        obj = json.loads(raw[start : end + 1])
-    except Exception:
+        return _RAW_DECODER.raw_decode(raw, start)[0]
+    except ValueError:
+        return None
+
+
+def parse_structured_json(text: str) -> dict[str, Any] | None:
+    raw = (text or "").strip()
+    if not raw:
         return None
-    if not isinstance(obj, dict):
+    # Strip common markdown wrappers from model output (fences are literal, no regex needed).
+    if raw[:7].lower() == "```json":
+        raw = raw[7:].lstrip()
+    elif raw.startswith("```"):
+        raw = raw[3:].lstrip()
+    if raw.endswith("```"):
+        raw = raw[:-3].rstrip()
+    # Fast path: well-behaved model output is already a bare JSON document.
+    try:
+        obj = _json_loads(raw)
+    except ValueError:
+        obj = None
+    if type(obj) is not dict:
+        # Not a bare object (invalid, or e.g. a list/string wrapping one): recover the first {...} inside.
+        obj = _extract_first_object(raw)
+    # JSON decoders only produce exact dict/list/str, so exact type checks suffice.
+    if type(obj) is not dict or not _REQUIRED.issubset(obj):
         return None
-    for key in STRUCTURED_KEYS:
-        if key not in obj:
-            return None
-    if not isinstance(obj.get("answer"), str):
+    if not (
+        type(obj["answer"]) is str
+        and type(obj["steps"]) is list
+        and type(obj["examples"]) is list
+        and type(obj["common_mistakes"]) is list
+        and type(obj["next_exercises"]) is list
+    ):
         return None
-    for list_key in STRUCTURED_KEYS[1:]:
-        if not isinstance(obj.get(list_key), list):
-            return None
     return obj
 
 
+_SENTENCE_END = frozenset(".?!")
+_SENTENCE_END_CJK = frozenset("。？！")  # end a sentence without needing trailing whitespace
+_JSON_ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+
+class AnswerSentenceStream:
+    """
+    Incrementally pull complete sentences out of the top-level "answer" string of streamed JSON.
+    Tracks only enough structure to find that value; every other key is skipped.
+    """
+
+    def __init__(self) -> None:
+        self.done = False
+        self._answer: list[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape: str | None = None
+        self._key_chars: list[str] = []
+        self._key: str | None = None
+        self._awaiting_value = False
+        self._in_answer = False
+        self._high_surrogate: int | None = None
+        self._sentence: list[str] = []
+        self._after_end = False
+
+    @property
+    def answer(self) -> str:
+        return "".join(self._answer)
+
+    def feed(self, delta: str) -> list[str]:
+        """Consume a streamed chunk and return any sentences of the answer it completed."""
+        out: list[str] = []
+        for ch in delta:
+            if self.done:
+                break
+            if self._in_string:
+                self._string_char(ch, out)
+            elif ch == '"':
+                self._in_string = True
+                self._key_chars = []
+                self._in_answer = self._depth == 1 and self._awaiting_value and self._key == "answer"
+            elif ch == "{" or ch == "[":
+                self._depth += 1
+            elif ch == "}" or ch == "]":
+                self._depth -= 1
+            elif self._depth == 1:
+                if ch == ":":
+                    self._awaiting_value = True
+                elif ch == ",":
+                    self._awaiting_value = False
+                    self._key = None
+        return out
+
+    def _string_char(self, ch: str, out: list[str]) -> None:
+        escape = self._escape
+        if escape is not None:
+            if escape == "":
+                if ch == "u":
+                    self._escape = "u"
+                    return
+                self._escape = None
+                self._decoded_char(_JSON_ESCAPES.get(ch, ch), out)
+                return
+            escape += ch
+            if len(escape) < 5:
+                self._escape = escape
+                return
+            self._escape = None
+            try:
+                code = int(escape[1:], 16)
+            except ValueError:
+                return
+            if 0xD800 <= code < 0xDC00:
+                self._high_surrogate = code
+                return
+            if 0xDC00 <= code < 0xE000 and self._high_surrogate is not None:
+                code = 0x10000 + ((self._high_surrogate - 0xD800) << 10) + (code - 0xDC00)
+            self._high_surrogate = None
+            self._decoded_char(chr(code), out)
+        elif ch == "\\":
+            self._escape = ""
+        elif ch == '"':
+            self._in_string = False
+            if self._in_answer:
+                self._end_sentence(out)
+                self.done = True
+            elif self._depth == 1:
+                if self._awaiting_value:
+                    self._awaiting_value = False
+                    self._key = None
+                else:
+                    self._key = "".join(self._key_chars)
+        else:
+            self._decoded_char(ch, out)
+
+    def _decoded_char(self, ch: str, out: list[str]) -> None:
+        if not self._in_answer:
+            if self._depth == 1 and not self._awaiting_value:
+                self._key_chars.append(ch)
+            return
+        self._answer.append(ch)
+        if self._after_end and ch.isspace():
+            self._end_sentence(out)
+            return
+        self._sentence.append(ch)
+        if ch in _SENTENCE_END_CJK:
+            self._end_sentence(out)
+        else:
+            self._after_end = ch in _SENTENCE_END
+
+    def _end_sentence(self, out: list[str]) -> None:
+        sentence = "".join(self._sentence).strip()
+        self._sentence = []
+        self._after_end = False
+        if sentence:
+            out.append(sentence)
+
+
 def safe_structured_fallback(target_language: str) -> dict[str, Any]:
     if target_language == "ko":
         return {
@@ -115,38 +260,51 @@ def coerce_structured_from_text(text: str, target_language: str) -> dict[str, An
     parsed = parse_structured_json(raw)
     if parsed:
         return parsed
+    return _coerce_unparsed(raw, base)
+
 
+def _coerce_unparsed(raw: str, base: dict[str, Any]) -> dict[str, Any]:
     # Remove code fences and keep compact plain text.
-    cleaned = re.sub(r"```(?:json)?", "", raw, flags=re.IGNORECASE).replace("```", "").strip()
+    cleaned = _FENCE_ANY.sub("", raw).replace("```", "").strip()
     lines = [ln.strip(" -\t") for ln in cleaned.splitlines() if ln.strip()]
     answer = lines[0] if lines else cleaned[:280]
     if not answer:
         return base
 
-    # Heuristic bullet extraction for step-like content.
-    bullets = [ln for ln in lines[1:] if len(ln) > 3]
-    steps = bullets[:3] if bullets else base["steps"]
-    examples = [b for b in bullets if any(ch.isdigit() for ch in b)][:3] or base["examples"]
-    mistakes = [b for b in bullets if any(k in b.lower() for k in ["mistake", "error", "wrong", "실수"])]
-    next_ex = [b for b in bullets if any(k in b.lower() for k in ["next", "practice", "exercise", "연습", "다음"])]
+    # Heuristic bullet extraction for step-like content, bucketed in a single pass.
+    steps: list[str] = []
+    examples: list[str] = []
+    mistakes: list[str] = []
+    next_ex: list[str] = []
+    for b in lines[1:]:
+        if len(b) <= 3:
+            continue
+        if len(steps) < 3:
+            steps.append(b)
+        if len(examples) < 3 and any(ch.isdigit() for ch in b):
+            examples.append(b)
+        lb = b.lower()
+        if "mistake" in lb or "error" in lb or "wrong" in lb or "실수" in lb:
+            mistakes.append(b)
+        if "next" in lb or "practice" in lb or "exercise" in lb or "연습" in lb or "다음" in lb:
+            next_ex.append(b)
 
     return {
         "answer": answer,
-        "steps": steps if isinstance(steps, list) and steps else base["steps"],
-        "examples": examples if isinstance(examples, list) and examples else base["examples"],
+        "steps": steps or base["steps"],
+        "examples": examples or base["examples"],
         "common_mistakes": mistakes if mistakes else base["common_mistakes"],
         "next_exercises": next_ex if next_ex else base["next_exercises"],
     }
 
 
 def is_image_required_query(query: str) -> bool:
-    q = (query or "").lower()
-    return any(k in q for k in ["this image", "in the image", "picture", "사진", "이미지", "첨부된"])
+    return bool(_IMG_RE.search(query or ""))
 
 
 def is_math_like_query(query: str) -> bool:
     q = query or ""
-    return bool(re.search(r"\d+\s*[\+\-\*/\^]\s*\d+", q))
+    return bool(_MATH_RE.search(q))
 
 
 async def _call_with_tools(
@@ -156,6 +314,7 @@ async def _call_with_tools(
     messages: list[dict[str, Any]],
     query: str,
     translator_mode: bool,
+    is_cancelled: Callable[[], bool] | None = None,
 ) -> AgentRuntimeResult:
     import time
 
@@ -167,10 +326,13 @@ async def _call_with_tools(
     model = settings.anthropic_model_primary
     request_id = None
     tools = available_tools_for_query(query, translator_mode)
-    loop_messages = list(messages)
+    # Copy-on-write: most turns never call a tool, so only copy the history once we must append.
+    loop_messages = messages
     final_text = ""
 
     for _ in range(max(1, settings.tool_max_iters)):
+        if is_cancelled is not None and is_cancelled():
+            break
         response = await claude.create(system=system, messages=loop_messages, tools=tools)
         total_in += response.input_tokens
         total_out += response.output_tokens
@@ -178,35 +340,29 @@ async def _call_with_tools(
         request_id = response.request_id
         final_text = response.text
 
-        tool_uses = [c for c in response.content if c.get("type") == "tool_use"]
-        if not tool_uses:
+        if not response.has_tool_use:
             break
+        tool_uses = [c for c in response.content if c.get("type") == "tool_use"]
 
+        if loop_messages is messages:
+            loop_messages = list(messages)
         loop_messages.append({"role": "assistant", "content": response.content})
+        calls = [(tc.get("id", ""), tc.get("name", ""), tc.get("input") or {}) for tc in tool_uses]
+        tool_calls.extend({"name": name, "args": args} for _, name, args in calls)
+        # Independent tool calls run concurrently under one budget: wall-clock is max(tool), not sum(tool).
+        outputs = await execute_tools([(name, args) for _, name, args in calls], settings.tool_timeout_ms)
         tool_result_blocks: list[dict[str, Any]] = []
-        for tc in tool_uses:
-            name = tc.get("name", "")
-            args = tc.get("input") or {}
-            tool_use_id = tc.get("id", "")
-            tool_calls.append({"name": name, "args": args})
-            try:
-                output = await execute_tool_with_timeout(name, args, settings.tool_timeout_ms)
-                tool_result_blocks.append(
-                    {
-                        "type": "tool_result",
-                        "tool_use_id": tool_use_id,
-                        "content": json.dumps(output, ensure_ascii=False),
-                    }
-                )
-            except Exception as exc:
+        for (tool_use_id, _, _), output in zip(calls, outputs):
+            if isinstance(output, BaseException):
                 tool_failures += 1
-                tool_result_blocks.append(
-                    {
-                        "type": "tool_result",
-                        "tool_use_id": tool_use_id,
-                        "content": json.dumps({"error": str(exc)}, ensure_ascii=False),
-                    }
-                )
+                output = {"error": str(output)}
+            tool_result_blocks.append(
+                {
+                    "type": "tool_result",
+                    "tool_use_id": tool_use_id,
+                    "content": _json_dumps(output),
+                }
+            )
         loop_messages.append({"role": "user", "content": tool_result_blocks})
 
     structured = parse_structured_json(final_text) or {}
@@ -229,16 +385,21 @@ async def _call_streaming_no_tools(
     system: str,
     messages: list[dict[str, Any]],
     on_token: Callable[[str], Any] | None = None,
+    is_cancelled: Callable[[], bool] | None = None,
 ) -> AgentRuntimeResult:
     import time
 
     started = time.perf_counter()
+    stream_kwargs: dict[str, Any] = {}
+    if is_cancelled is not None:
+        stream_kwargs["is_cancelled"] = is_cancelled
     response = await claude.stream_text(
         system=system,
         messages=messages,
         on_delta=on_token,
         max_tokens=settings.llm_max_tokens,
         temperature=settings.llm_temperature,
+        **stream_kwargs,
     )
     structured = parse_structured_json(response.text) or {}
     return AgentRuntimeResult(
@@ -262,7 +423,9 @@ async def run_tutor_turn(
     target_language: str,
     translator_mode: bool,
     on_token: Callable[[str], Any] | None = None,
+    is_cancelled: Callable[[], bool] | None = None,
 ) -> AgentRuntimeResult:
+    """is_cancelled lets a superseded turn stop streaming, tool rounds and repairs early."""
     system = build_structured_system_prompt(target_language, translator_mode)
     offered_tools = available_tools_for_query(query, translator_mode)
     if offered_tools:
@@ -272,6 +435,7 @@ async def run_tutor_turn(
             messages=conversation_messages,
             query=query,
             translator_mode=translator_mode,
+            is_cancelled=is_cancelled,
         )
     else:
         result = await _call_streaming_no_tools(
@@ -279,13 +443,16 @@ async def run_tutor_turn(
             system=system,
             messages=conversation_messages,
             on_token=on_token,
+            is_cancelled=is_cancelled,
         )
-    if parse_structured_json(result.raw_text):
-        result.structured = parse_structured_json(result.raw_text) or {}
+    # Both call paths already parsed raw_text into result.structured ({} when invalid).
+    if result.structured:
         return result
 
     if settings.strict_structured_mode:
         for _ in range(2):
+            if is_cancelled is not None and is_cancelled():
+                break
             repair_messages = list(conversation_messages) + [
                 {"role": "assistant", "content": [{"type": "text", "text": result.raw_text}]},
                 {
@@ -320,6 +487,10 @@ async def run_tutor_turn(
                 result.output_tokens += repair_resp.output_tokens
                 return result
 
-    result.structured = coerce_structured_from_text(result.raw_text, target_language)
-    result.raw_text = json.dumps(result.structured, ensure_ascii=False)
+    # raw_text is known not to parse here, so skip straight to the heuristic coercion;
+    # this is the only path whose structured dict has no JSON text yet.
+    base = safe_structured_fallback(target_language)
+    raw = (result.raw_text or "").strip()
+    result.structured = _coerce_unparsed(raw, base) if raw else base
+    result.raw_text = _json_dumps(result.structured)
     return result
@@ -1,8 +1,15 @@
 import asyncio
+import atexit
 import json
 import logging
+import logging.handlers
+import queue
 import time
-from typing import Dict, Optional
+import weakref
+from binascii import a2b_base64
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Optional
 from pathlib import Path
 import sys
 
@@ -12,14 +19,15 @@ if str(APP_MODULE_DIR) not in sys.path:
 
 from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import FileResponse, HTMLResponse
 from fastapi.staticfiles import StaticFiles
+import grpc
 from google.cloud import speech, texttospeech
 
 from agent.runtime import (
+    AnswerSentenceStream,
     build_structured_system_prompt,
     is_image_required_query,
-    parse_structured_json,
     run_tutor_turn,
     safe_structured_fallback,
 )
@@ -32,7 +40,28 @@ from stt_stream import StreamingSTT
 from tts_stream import StreamingTTS
 from websocket_protocol import WebSocketProtocol
 
-logging.basicConfig(level=getattr(logging, settings.log_level.upper(), logging.INFO), format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+
+
+class _EventFormatter(logging.Formatter):
+    """Renders records logged with extra={"fields": {...}} as one JSON object."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        fields = getattr(record, "fields", None)
+        if fields is not None:
+            record.msg = json.dumps({"event": record.getMessage(), **fields}, ensure_ascii=False)
+            record.args = None
+        return super().format(record)
+
+
+# The request path only enqueues records; formatting and stream I/O run on the listener thread.
+_log_handler = logging.StreamHandler()
+_log_handler.setFormatter(_EventFormatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+_log_listener = logging.handlers.QueueListener(queue.SimpleQueue(), _log_handler)
+_queue_handler = logging.handlers.QueueHandler(_log_listener.queue)
+_queue_handler.setFormatter(logging.Formatter("%(message)s"))
+logging.basicConfig(level=getattr(logging, settings.log_level.upper(), logging.INFO), handlers=[_queue_handler])
+_log_listener.start()
+atexit.register(_log_listener.stop)
 logger = logging.getLogger(__name__)
 
 app = FastAPI(title=settings.app_name)
@@ -40,20 +69,107 @@ app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True,
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
 claude_client = AnthropicClient(api_key=settings.anthropic_api_key) if settings.anthropic_api_key else None
+# One client (and gRPC channel) per process, shared by every session's StreamingSTT / StreamingTTS
 speech_client = speech.SpeechClient()
 tts_client = texttospeech.TextToSpeechClient()
-sessions: Dict[str, SessionState] = {}
+# Admin view only: each connection owns its SessionState, entries drop out once it is released
+sessions: "weakref.WeakValueDictionary[str, SessionState]" = weakref.WeakValueDictionary()
+
+# Frames whose payload never changes are encoded once at import.
+AUDIO_COMPLETE_FRAME = WebSocketProtocol.encode_json_message(WebSocketProtocol.AUDIO_COMPLETE, {})
+CONFIG_UPDATED_FRAME = WebSocketProtocol.encode_json_message(WebSocketProtocol.CONFIG_UPDATED, {"status": "ok"})
+IMAGE_RECEIVED_FRAME = WebSocketProtocol.encode_json_message(WebSocketProtocol.IMAGE_RECEIVED, {"status": "ready"})
 
 
+def _notes_frame(structured: dict) -> bytes:
+    """NOTES frame carrying the structured notes as its JSON payload, encoded in one pass."""
+    return WebSocketProtocol.encode_json_message(WebSocketProtocol.NOTES, structured)
+
+
+@lru_cache(maxsize=8)
 def build_instructions(target_lang: str, translator_mode: bool) -> str:
     return build_structured_system_prompt(target_lang, translator_mode)
 
 
-async def send_binary_message(websocket: WebSocket, msg_type: int, payload: bytes):
+class BatchedSender:
+    """Per-connection writer that coalesces queued frames into a single send_bytes call.
+
+    Frames are length-prefixed, so the client splits a coalesced message back apart.
+    """
+
+    MAX_BATCH = 128
+    MAX_BATCH_BYTES = 64_000  # cap each coalesced message so a burst of audio can't build one huge frame
+
+    def __init__(self, websocket: WebSocket):
+        self._websocket = websocket
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    def send(self, frame: bytes) -> None:
+        self._queue.put_nowait(frame)
+
+    async def _run(self):
+        queue = self._queue
+        while True:
+            frame = await queue.get()
+            if frame is None:
+                return
+            frames = [frame]
+            size = len(frame)
+            closing = False
+            while len(frames) < self.MAX_BATCH and size < self.MAX_BATCH_BYTES:
+                try:
+                    frame = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if frame is None:
+                    closing = True
+                    break
+                frames.append(frame)
+                size += len(frame)
+            try:
+                await self._websocket.send_bytes(frames[0] if len(frames) == 1 else b"".join(frames))
+            except (WebSocketDisconnect, RuntimeError, ConnectionError):
+                # Expected errors when WebSocket is closed - nothing more can be delivered
+                return
+            except Exception as e:
+                logger.error(f"Error sending batched frames: {e}")
+            if closing:
+                return
+
+    async def close(self, timeout_s: float = 1.0):
+        """Flush queued frames, then stop the writer."""
+        self._queue.put_nowait(None)
+        try:
+            await asyncio.wait_for(self._task, timeout=timeout_s)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            self._task.cancel()
+
+
+async def _send_frame(websocket: WebSocket, message: bytes):
+    sender = getattr(websocket.state, "sender", None)
+    if sender is not None:
+        sender.send(message)
+    else:
+        await websocket.send_bytes(message)
+
+
+async def send_encoded_message(websocket: WebSocket, message: bytes):
+    """Send an already-encoded WebSocket frame"""
+    try:
+        await _send_frame(websocket, message)
+    except (WebSocketDisconnect, RuntimeError, ConnectionError):
+        # Expected errors when WebSocket is closed - don't log as error
+        pass
+    except Exception as e:
+        logger.error(f"Error sending message: {e}")
+
+
+async def send_binary_message(websocket: WebSocket, msg_type: int, payload: bytes | memoryview):
     """Send binary WebSocket message"""
     try:
         message = WebSocketProtocol.encode_message(msg_type, payload)
-        await websocket.send_bytes(message)
+        await _send_frame(websocket, message)
     except (WebSocketDisconnect, RuntimeError, ConnectionError) as e:
         # Expected errors when WebSocket is closed - don't log as error
         pass
@@ -65,7 +181,7 @@ async def send_json_message(websocket: WebSocket, msg_type: int, data: dict):
     """Send JSON WebSocket message"""
     try:
         message = WebSocketProtocol.encode_json_message(msg_type, data)
-        await websocket.send_bytes(message)
+        await _send_frame(websocket, message)
     except (WebSocketDisconnect, RuntimeError, ConnectionError) as e:
         # Expected errors when WebSocket is closed - don't log as error
         pass
@@ -73,31 +189,103 @@ async def send_json_message(websocket: WebSocket, msg_type: int, data: dict):
         logger.error(f"Error sending JSON message: {e}")
 
 
+def send_json_message_nowait(websocket: WebSocket, msg_type: int, data: dict):
+    """Queue a JSON message from synchronous code (e.g. timer callbacks)"""
+    sender = getattr(websocket.state, "sender", None)
+    if sender is None:
+        asyncio.ensure_future(send_json_message(websocket, msg_type, data))
+        return
+    try:
+        sender.send(WebSocketProtocol.encode_json_message(msg_type, data))
+    except Exception as e:
+        logger.error(f"Error sending JSON message: {e}")
+
+
+class DeltaCoalescer:
+    """Buffers streamed LLM tokens and sends them as one LLM_DELTA per time/size window."""
+
+    def __init__(self, websocket: WebSocket, session_state: SessionState, window_s: float = 0.025, max_chars: int = 64):
+        self._websocket = websocket
+        self._session_state = session_state
+        self._window_s = window_s
+        self._max_chars = max_chars
+        self._buf: list[str] = []
+        self._size = 0
+        self._handle: Optional[asyncio.TimerHandle] = None
+
+    def add(self, delta: str):
+        self._buf.append(delta)
+        self._size += len(delta)
+        if self._size >= self._max_chars:
+            self.flush()
+        elif self._handle is None:
+            self._handle = asyncio.get_running_loop().call_later(self._window_s, self.flush)
+
+    def flush(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        if not self._buf:
+            return
+        text = "".join(self._buf)
+        self._buf.clear()
+        self._size = 0
+        send_json_message_nowait(
+            self._websocket,
+            WebSocketProtocol.LLM_DELTA,
+            {"text": text, "turn_id": self._session_state.current_turn_id, "final": False},
+        )
+
+    def close(self):
+        """Drop anything still buffered without sending it."""
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._buf.clear()
+        self._size = 0
+
+
 async def send_error(websocket: WebSocket, message: str, code: int = 500):
     await send_json_message(websocket, WebSocketProtocol.ERROR, {"message": message, "code": code})
 
 
+KO_STEP_HEADER = "핵심 단계:"
+EN_STEP_HEADER = "Key steps:"
+
+
 def _structured_to_speakable_text(structured: dict, target_lang: str) -> str:
-    answer = str(structured.get("answer", "")).strip()
-    steps = [str(s).strip() for s in structured.get("steps", []) if str(s).strip()]
-    examples = [str(s).strip() for s in structured.get("examples", []) if str(s).strip()]
-    if target_lang == "ko":
-        lines = [answer]
-        if steps:
-            lines.append("핵심 단계:")
-            lines.extend([f"{i+1}. {s}" for i, s in enumerate(steps[:3])])
-        if examples:
-            lines.append(f"예시: {examples[0]}")
-        return "\n".join(lines).strip()
-    lines = [answer]
-    if steps:
-        lines.append("Key steps:")
-        lines.extend([f"{i+1}. {s}" for i, s in enumerate(steps[:3])])
-    if examples:
-        lines.append(f"Example: {examples[0]}")
+    ko = target_lang == "ko"
+    lines = [str(structured.get("answer", "")).strip()]
+    step_no = 0
+    for step in structured.get("steps", []):
+        step = str(step).strip()
+        if not step:
+            continue
+        if not step_no:
+            lines.append(KO_STEP_HEADER if ko else EN_STEP_HEADER)
+        step_no += 1
+        lines.append(f"{step_no}. {step}")
+        if step_no == 3:
+            break
+    for example in structured.get("examples", []):
+        example = str(example).strip()
+        if example:
+            lines.append(f"예시: {example}" if ko else f"Example: {example}")
+            break
     return "\n".join(lines).strip()
 
 
+def _split_image_data_url(data: str) -> tuple[str, str]:
+    """Split a data URL into (mime_type, base64 payload); bare base64 is assumed to be JPEG."""
+    mime_type = "image/jpeg"
+    if data.startswith("data:") and "," in data:
+        header, data = data.split(",", 1)
+        if ";" in header:
+            mime_type = header[5:].split(";", 1)[0] or mime_type
+    return mime_type, data
+
+
+@lru_cache(maxsize=4)
 def _clarification_text(target_lang: str) -> str:
     if target_lang == "ko":
         return "방금 말씀을 정확히 듣지 못했어요. 한 번만 더 천천히 말씀해 주실래요?"
@@ -110,24 +298,42 @@ async def _speak_text(
     session_state: SessionState,
     generation_id: int,
     text: str,
-    turn_cancel_event: asyncio.Event,
-) -> float:
+    send_complete: bool = True,
+) -> tuple[float, float]:
+    """Speak text; returns (tts_latency_ms, end timestamp) so callers need not re-read the clock."""
     tts_started = time.perf_counter()
 
-    async def on_audio_chunk(chunk: bytes):
-        if generation_id != session_state.generation_id or turn_cancel_event.is_set():
+    async def on_audio_chunk(chunk: bytes | memoryview):
+        if generation_id != session_state.generation_id:
             return
         await send_binary_message(websocket, WebSocketProtocol.AUDIO_CHUNK, chunk)
 
     async def on_complete():
-        if generation_id != session_state.generation_id or turn_cancel_event.is_set():
+        if generation_id != session_state.generation_id:
             return
-        await send_json_message(websocket, WebSocketProtocol.AUDIO_COMPLETE, {})
+        await send_encoded_message(websocket, AUDIO_COMPLETE_FRAME)
+
+    tts_stream = StreamingTTS(
+        tts_client=tts_client,
+        on_audio_chunk=on_audio_chunk,
+        on_complete=on_complete if send_complete else None,
+    )
+    await tts_stream.synthesize_and_stream(
+        text=text,
+        language_code=session_state.language_code,
+        is_cancelled=lambda: generation_id != session_state.generation_id,
+    )
+    tts_ended = time.perf_counter()
+    return (tts_ended - tts_started) * 1000.0, tts_ended
 
-    tts_stream = StreamingTTS(tts_client=tts_client, on_audio_chunk=on_audio_chunk, on_complete=on_complete)
-    tts_language = "ko-KR" if session_state.target_language == "ko" else "en-US"
-    await tts_stream.synthesize_and_stream(text=text, language_code=tts_language, cancel_event=turn_cancel_event)
-    return (time.perf_counter() - tts_started) * 1000.0
+
+@dataclass
+class TurnJob:
+    transcript: str
+    confidence: float
+    generation_id: int
+    turn_started: float
+    stt_latency_ms: float
 
 
 async def handle_final_transcript(
@@ -138,248 +344,323 @@ async def handle_final_transcript(
 ):
     if not transcript or transcript.strip() == "":
         return
-    turn_started = session_state.turn_started_at or time.perf_counter()
-    stt_latency_ms = max(0.0, (time.perf_counter() - turn_started) * 1000.0)
+    now = time.perf_counter()
+    turn_started = session_state.turn_started_at or now
+    stt_latency_ms = max(0.0, (now - turn_started) * 1000.0)
     session_state.last_transcript_confidence = confidence
     logger.info(
-        json.dumps(
-            {
-                "event": "final_transcript",
+        "final_transcript",
+        extra={
+            "fields": {
                 "session_id": session_state.session_id,
                 "turn_id": session_state.current_turn_id,
                 "chars": len(transcript),
                 "confidence": round(confidence, 3),
-            },
-            ensure_ascii=False,
-        )
+            }
+        },
     )
 
     await send_json_message(websocket, WebSocketProtocol.TRANSCRIPT_FINAL, {"text": transcript, "confidence": confidence})
+    # Bumping the generation id is the only cancellation signal stale work needs to check.
     generation_id = session_state.increment_generation_id()
-    if session_state.active_generation_cancel_event is not None:
-        session_state.active_generation_cancel_event.set()
-    turn_cancel_event = asyncio.Event()
-    session_state.active_generation_cancel_event = turn_cancel_event
     session_state.is_tts_playing = False
+    # A newer transcript supersedes whatever the worker is still generating.
+    session_state.cancel_in_flight_turn()
 
-    async def generate_and_speak():
+    job = TurnJob(
+        transcript=transcript,
+        confidence=confidence,
+        generation_id=generation_id,
+        turn_started=turn_started,
+        stt_latency_ms=stt_latency_ms,
+    )
+    queue = session_state.turn_queue
+    if queue.full():
+        # Anything still queued is stale now; keep the newest transcript.
+        queue.get_nowait()
+    queue.put_nowait(job)
+
+
+async def generation_worker(session_state: SessionState, websocket: WebSocket):
+    """Long-lived per-session consumer of final transcripts; runs one turn at a time."""
+    queue = session_state.turn_queue
+    current = asyncio.current_task()
+    while not session_state.closed:
         try:
-            if confidence < settings.stt_confidence_threshold:
-                metrics.transcripts_low_confidence_total += 1
-                clarification = _clarification_text(session_state.target_language)
-                await send_json_message(
-                    websocket,
-                    WebSocketProtocol.LLM_DELTA,
-                    {
-                        "text": clarification,
-                        "turn_id": session_state.current_turn_id,
-                        "final": True,
-                    },
-                )
-                session_state.is_tts_playing = True
-                tts_latency = await _speak_text(
-                    websocket=websocket,
+            job = await queue.get()
+            if job.generation_id != session_state.generation_id:
+                continue  # superseded before it started
+            session_state.turn_in_flight = True
+            try:
+                await _run_turn(session_state, websocket, job)
+            finally:
+                session_state.turn_in_flight = False
+        except asyncio.CancelledError:
+            if session_state.closed:
+                raise
+        # Barge-in cancels only the in-flight turn; clear the request so the worker keeps serving.
+        while current.cancelling():
+            current.uncancel()
+
+
+async def _run_turn(session_state: SessionState, websocket: WebSocket, job: TurnJob):
+    transcript = job.transcript
+    confidence = job.confidence
+    generation_id = job.generation_id
+    turn_started = job.turn_started
+    stt_latency_ms = job.stt_latency_ms
+    deltas = DeltaCoalescer(websocket, session_state)
+    try:
+        if confidence < settings.stt_confidence_threshold:
+            metrics.transcripts_low_confidence_total += 1
+            clarification = _clarification_text(session_state.target_language)
+            await send_json_message(
+                websocket,
+                WebSocketProtocol.LLM_DELTA,
+                {
+                    "text": clarification,
+                    "turn_id": session_state.current_turn_id,
+                    "final": True,
+                },
+            )
+            session_state.is_tts_playing = True
+            tts_latency, tts_ended = await _speak_text(
+                websocket=websocket,
                 session_state=session_state,
-                    generation_id=generation_id,
-                    text=clarification,
-                    turn_cancel_event=turn_cancel_event,
-                )
-                metrics.record_turn(stt_latency_ms=stt_latency_ms, llm_latency_ms=0.0, tts_latency_ms=tts_latency, e2e_latency_ms=(time.perf_counter() - turn_started) * 1000.0)
-                session_state.is_tts_playing = False
-                return
+                generation_id=generation_id,
+                text=clarification,
+            )
+            metrics.record_turn(stt_latency_ms=stt_latency_ms, llm_latency_ms=0.0, tts_latency_ms=tts_latency, e2e_latency_ms=(tts_ended - turn_started) * 1000.0)
+            session_state.is_tts_playing = False
+            return
 
-            if is_image_required_query(transcript) and not session_state.uploaded_image:
-                guardrail_text = (
-                    "이미지 관련 질문을 하셨다면 먼저 이미지를 업로드해 주세요."
-                    if session_state.target_language == "ko"
-                    else "If your question is about an image, please upload the image first."
-                )
-                await send_json_message(
-                    websocket,
-                    WebSocketProtocol.LLM_DELTA,
-                    {
-                        "text": guardrail_text,
-                        "turn_id": session_state.current_turn_id,
-                        "final": True,
-                    },
-                )
-                session_state.is_tts_playing = True
-                tts_latency = await _speak_text(
-                    websocket=websocket,
-                    session_state=session_state,
-                    generation_id=generation_id,
-                    text=guardrail_text,
-                    turn_cancel_event=turn_cancel_event,
-                )
-                metrics.record_turn(stt_latency_ms=stt_latency_ms, llm_latency_ms=0.0, tts_latency_ms=tts_latency, e2e_latency_ms=(time.perf_counter() - turn_started) * 1000.0)
-                session_state.is_tts_playing = False
-                return
-            
-            if claude_client is None:
-                raise RuntimeError("ANTHROPIC_API_KEY is missing")
-
-            llm_started = time.perf_counter()
-            image_blocks: list[dict] = []
-            use_uploaded_image = bool(session_state.uploaded_image and is_image_required_query(transcript))
-            if use_uploaded_image:
-                mime_type = "image/jpeg"
-                data = session_state.uploaded_image
-                if data.startswith("data:") and "," in data:
-                    header, b64_data = data.split(",", 1)
-                    data = b64_data
-                    if ";" in header:
-                        mime_type = header[5:].split(";", 1)[0] or mime_type
-                image_blocks.append({"type": "image", "source": {"type": "base64", "media_type": mime_type, "data": data}})
-
-            conv = []
-            for msg in session_state.conversation_history[-10:]:
-                conv.append({"role": msg.get("role", "user"), "content": [{"type": "text", "text": msg.get("text", "")}]})
-            user_content = [{"type": "text", "text": transcript}] + image_blocks
-            conv.append({"role": "user", "content": user_content})
-            has_image_in_turn = len(image_blocks) > 0
-
-            token_buffer: list[str] = []
-
-            async def _on_token(delta: str):
-                token_buffer.append(delta)
-                await send_json_message(
-                    websocket,
-                    WebSocketProtocol.LLM_DELTA,
-                    {
-                        "text": delta,
-                        "turn_id": session_state.current_turn_id,
-                        "final": False,
-                    },
-                )
+        needs_image = is_image_required_query(transcript)
+        if needs_image and not session_state.uploaded_image:
+            guardrail_text = (
+                "이미지 관련 질문을 하셨다면 먼저 이미지를 업로드해 주세요."
+                if session_state.target_language == "ko"
+                else "If your question is about an image, please upload the image first."
+            )
+            await send_json_message(
+                websocket,
+                WebSocketProtocol.LLM_DELTA,
+                {
+                    "text": guardrail_text,
+                    "turn_id": session_state.current_turn_id,
+                    "final": True,
+                },
+            )
+            session_state.is_tts_playing = True
+            tts_latency, tts_ended = await _speak_text(
+                websocket=websocket,
+                session_state=session_state,
+                generation_id=generation_id,
+                text=guardrail_text,
+            )
+            metrics.record_turn(stt_latency_ms=stt_latency_ms, llm_latency_ms=0.0, tts_latency_ms=tts_latency, e2e_latency_ms=(tts_ended - turn_started) * 1000.0)
+            session_state.is_tts_playing = False
+            return
+        
+        if claude_client is None:
+            raise RuntimeError("ANTHROPIC_API_KEY is missing")
 
-            try:
-                timeout_budget_s = max(
-                    1.0,
-                    (
-                        settings.image_time_budget_ms
-                        if has_image_in_turn
-                        else settings.time_budget_ms
-                    ) / 1000.0,
-                )
-                result = await asyncio.wait_for(
-                    run_tutor_turn(
-                        claude=claude_client,
-                        conversation_messages=conv,
-                        query=transcript,
-                        target_language=session_state.target_language,
-                        translator_mode=session_state.translator_mode,
-                        on_token=_on_token,
-                    ),
-                    timeout=timeout_budget_s,
-                )
-            except asyncio.TimeoutError:
-                quick = safe_structured_fallback(session_state.target_language)
-                quick["answer"] = (
-                    "응답이 길어질 것 같아 핵심만 먼저 짧게 정리할게요."
-                    if session_state.target_language == "ko"
-                    else "This may take longer, so here is a quick summary first."
-                )
-                quick_text = _structured_to_speakable_text(quick, session_state.target_language)
-                await send_json_message(
-                    websocket,
-                    WebSocketProtocol.LLM_DELTA,
-                    {
-                        "text": quick_text,
-                        "turn_id": session_state.current_turn_id,
-                        "final": True,
-                    },
-                )
-                llm_latency = (time.perf_counter() - llm_started) * 1000.0
-                session_state.is_tts_playing = True
-                tts_latency = await _speak_text(
+        llm_started = time.perf_counter()
+        image_blocks: list[dict] = []
+        use_uploaded_image = bool(session_state.uploaded_image and needs_image)
+        if use_uploaded_image:
+            mime_type, data = session_state.uploaded_image_parts or _split_image_data_url(session_state.uploaded_image)
+            image_blocks.append({"type": "image", "source": {"type": "base64", "media_type": mime_type, "data": data}})
+
+        conv = list(session_state.anthropic_messages)
+        user_content = [{"type": "text", "text": transcript}] + image_blocks
+        conv.append({"role": "user", "content": user_content})
+        has_image_in_turn = len(image_blocks) > 0
+
+        sent_any_delta = False
+        # Optional: speak the answer sentence by sentence while the rest of the JSON is still streaming.
+        answer_stream = AnswerSentenceStream() if settings.streaming_tts_enabled else None
+        sentence_queue: asyncio.Queue = asyncio.Queue()
+
+        async def _speak_sentences():
+            while (sentence := await sentence_queue.get()) is not None:
+                await _speak_text(
                     websocket=websocket,
                     session_state=session_state,
                     generation_id=generation_id,
-                    text=quick_text,
-                    turn_cancel_event=turn_cancel_event,
-                )
-                metrics.record_turn(
-                    stt_latency_ms=stt_latency_ms,
-                    llm_latency_ms=llm_latency,
-                    tts_latency_ms=tts_latency,
-                    e2e_latency_ms=(time.perf_counter() - turn_started) * 1000.0,
+                    text=sentence,
+                    send_complete=False,
                 )
-                session_state.is_tts_playing = False
-                await send_json_message(websocket, WebSocketProtocol.NOTES, {"text": json.dumps(quick, ensure_ascii=False, indent=2)})
-                return
 
-            llm_latency = (time.perf_counter() - llm_started) * 1000.0
-
-            if turn_cancel_event.is_set():
-                session_state.is_tts_playing = False
-                return
-            if generation_id != session_state.generation_id:
-                session_state.is_tts_playing = False
-                return
-            
-            structured = parse_structured_json(result.raw_text) or result.structured or safe_structured_fallback(session_state.target_language)
-            speak_text = _structured_to_speakable_text(structured, session_state.target_language)
-
-            if token_buffer:
-                await send_json_message(
-                    websocket,
-                    WebSocketProtocol.LLM_DELTA,
-                    {"text": "", "turn_id": session_state.current_turn_id, "final": True},
-                )
-            else:
-                await send_json_message(
-                    websocket,
-                    WebSocketProtocol.LLM_DELTA,
-                    {"text": result.raw_text, "turn_id": session_state.current_turn_id, "final": True},
-                )
+        async def _on_token(delta: str):
+            nonlocal sent_any_delta
+            sent_any_delta = True
+            if answer_stream is not None and generation_id == session_state.generation_id:
+                for sentence in answer_stream.feed(delta):
+                    if session_state.tts_task is None:
+                        session_state.is_tts_playing = True
+                        session_state.tts_task = asyncio.create_task(_speak_sentences())
+                    sentence_queue.put_nowait(sentence)
+            deltas.add(delta)
 
+        try:
+            timeout_budget_s = max(
+                1.0,
+                (
+                    settings.image_time_budget_ms
+                    if has_image_in_turn
+                    else settings.time_budget_ms
+                ) / 1000.0,
+            )
+            result = await asyncio.wait_for(
+                run_tutor_turn(
+                    claude=claude_client,
+                    conversation_messages=conv,
+                    query=transcript,
+                    target_language=session_state.target_language,
+                    translator_mode=session_state.translator_mode,
+                    on_token=_on_token,
+                    is_cancelled=lambda: generation_id != session_state.generation_id,
+                ),
+                timeout=timeout_budget_s,
+            )
+        except asyncio.TimeoutError:
+            _stop_streamed_tts(session_state)
+            deltas.flush()
+            quick = safe_structured_fallback(session_state.target_language)
+            quick["answer"] = (
+                "응답이 길어질 것 같아 핵심만 먼저 짧게 정리할게요."
+                if session_state.target_language == "ko"
+                else "This may take longer, so here is a quick summary first."
+            )
+            quick_text = _structured_to_speakable_text(quick, session_state.target_language)
+            await send_json_message(
+                websocket,
+                WebSocketProtocol.LLM_DELTA,
+                {
+                    "text": quick_text,
+                    "turn_id": session_state.current_turn_id,
+                    "final": True,
+                },
+            )
+            llm_latency = (time.perf_counter() - llm_started) * 1000.0
             session_state.is_tts_playing = True
-            tts_latency = await _speak_text(
+            tts_latency, tts_ended = await _speak_text(
                 websocket=websocket,
                 session_state=session_state,
                 generation_id=generation_id,
-                text=speak_text,
-                turn_cancel_event=turn_cancel_event,
+                text=quick_text,
             )
-            session_state.is_tts_playing = False
-            
-            session_state.conversation_history.append({"role": "user", "text": transcript})
-            session_state.conversation_history.append({"role": "assistant", "text": speak_text})
-            session_state.conversation_history = session_state.conversation_history[-20:]
-
-            metrics.tool_calls_total += len(result.tool_calls)
-            metrics.tool_failures_total += int(result.tool_failures)
             metrics.record_turn(
                 stt_latency_ms=stt_latency_ms,
                 llm_latency_ms=llm_latency,
                 tts_latency_ms=tts_latency,
-                e2e_latency_ms=(time.perf_counter() - turn_started) * 1000.0,
+                e2e_latency_ms=(tts_ended - turn_started) * 1000.0,
             )
+            session_state.is_tts_playing = False
+            await send_encoded_message(websocket, _notes_frame(quick))
+            return
+
+        llm_ended = time.perf_counter()
+        llm_latency = (llm_ended - llm_started) * 1000.0
 
-            await send_json_message(websocket, WebSocketProtocol.NOTES, {"text": json.dumps(structured, ensure_ascii=False, indent=2)})
-            logger.info(
-                json.dumps(
-                    {
-                        "event": "turn_complete",
-                        "session_id": session_state.session_id,
-                        "turn_id": session_state.current_turn_id,
-                        "model": result.model,
-                        "request_id": result.request_id,
-                        "tokens_in": result.input_tokens,
-                        "tokens_out": result.output_tokens,
-                        "tool_calls": [t["name"] for t in result.tool_calls],
-                    },
-                    ensure_ascii=False,
+        if generation_id != session_state.generation_id:
+            session_state.is_tts_playing = False
+            return
+        
+        # run_tutor_turn has already parsed (or repaired/coerced) raw_text into result.structured.
+        structured = result.structured or safe_structured_fallback(session_state.target_language)
+        speak_text = _structured_to_speakable_text(structured, session_state.target_language)
+
+        deltas.flush()
+        if sent_any_delta:
+            await send_json_message(
+                websocket,
+                WebSocketProtocol.LLM_DELTA,
+                {"text": "", "turn_id": session_state.current_turn_id, "final": True},
+            )
+        else:
+            await send_json_message(
+                websocket,
+                WebSocketProtocol.LLM_DELTA,
+                {"text": result.raw_text, "turn_id": session_state.current_turn_id, "final": True},
+            )
+
+        session_state.is_tts_playing = True
+        streamed_tts_task = session_state.tts_task
+        if streamed_tts_task is not None:
+            sentence_queue.put_nowait(None)
+            await streamed_tts_task
+            session_state.tts_task = None
+            # The answer has been spoken already unless repair/coercion replaced it.
+            tail = structured if answer_stream.answer != structured.get("answer") else {**structured, "answer": ""}
+            tail_text = _structured_to_speakable_text(tail, session_state.target_language)
+            if tail_text:
+                _, tts_ended = await _speak_text(
+                    websocket=websocket,
+                    session_state=session_state,
+                    generation_id=generation_id,
+                    text=tail_text,
                 )
+            else:
+                if generation_id == session_state.generation_id:
+                    await send_encoded_message(websocket, AUDIO_COMPLETE_FRAME)
+                tts_ended = time.perf_counter()
+            # Measured from LLM completion: the time spent waiting on audio after the text is final.
+            tts_latency = (tts_ended - llm_ended) * 1000.0
+        else:
+            tts_latency, tts_ended = await _speak_text(
+                websocket=websocket,
+                session_state=session_state,
+                generation_id=generation_id,
+                text=speak_text,
             )
-        except asyncio.CancelledError:
-            session_state.is_tts_playing = False
-        except Exception as e:
-            logger.error(f"Error in generate_and_speak: {e}")
-            session_state.is_tts_playing = False
-            await send_error(websocket, f"Error generating response: {str(e)}")
-    
-    session_state.llm_task = asyncio.create_task(generate_and_speak())
+        session_state.is_tts_playing = False
+        
+        session_state.conversation_history.append({"role": "user", "text": transcript})
+        session_state.conversation_history.append({"role": "assistant", "text": speak_text})
+        session_state.anthropic_messages.append({"role": "user", "content": [{"type": "text", "text": transcript}]})
+        session_state.anthropic_messages.append({"role": "assistant", "content": [{"type": "text", "text": speak_text}]})
+
+        metrics.tool_calls_total += len(result.tool_calls)
+        metrics.tool_failures_total += int(result.tool_failures)
+        metrics.record_turn(
+            stt_latency_ms=stt_latency_ms,
+            llm_latency_ms=llm_latency,
+            tts_latency_ms=tts_latency,
+            e2e_latency_ms=(tts_ended - turn_started) * 1000.0,
+        )
+
+        await send_encoded_message(websocket, _notes_frame(structured))
+        logger.info(
+            "turn_complete",
+            extra={
+                "fields": {
+                    "session_id": session_state.session_id,
+                    "turn_id": session_state.current_turn_id,
+                    "model": result.model,
+                    "request_id": result.request_id,
+                    "tokens_in": result.input_tokens,
+                    "tokens_out": result.output_tokens,
+                    "tool_calls": [t["name"] for t in result.tool_calls],
+                }
+            },
+        )
+    except asyncio.CancelledError:
+        session_state.is_tts_playing = False
+    except Exception as e:
+        logger.error(f"Error in generation turn: {e}")
+        session_state.is_tts_playing = False
+        await send_error(websocket, f"Error generating response: {str(e)}")
+    finally:
+        deltas.close()
+        _stop_streamed_tts(session_state)
+
+
+def _stop_streamed_tts(session_state: SessionState):
+    if session_state.tts_task is not None:
+        if not session_state.tts_task.done():
+            session_state.tts_task.cancel()
+        session_state.tts_task = None
 
 
 async def handle_interim_transcript(websocket: WebSocket, transcript: str):
@@ -392,8 +673,8 @@ async def handle_interim_transcript(websocket: WebSocket, transcript: str):
 
 @app.get("/", response_class=HTMLResponse)
 def index():
-    with open("static/index.html", "r", encoding="utf-8") as f:
-        return HTMLResponse(f.read())
+    # Served straight from disk (sendfile where available) with ETag/Last-Modified headers.
+    return FileResponse("static/index.html", media_type="text/html")
 
 
 @app.get("/health")
@@ -403,7 +684,7 @@ def health():
 
 @app.get("/api/metrics")
 def api_metrics():
-    return metrics.as_dict(active_sessions=len(sessions))
+    return metrics.as_dict(active_sessions=sum(1 for s in sessions.values() if not s.closed))
 
 
 @app.post("/api/chat")
@@ -424,7 +705,7 @@ async def chat(payload: dict):
         translator_mode=translator_mode,
         on_token=None,
     )
-    structured = parse_structured_json(result.raw_text) or result.structured or safe_structured_fallback(target)
+    structured = result.structured or safe_structured_fallback(target)
     return {
         "structured": structured,
         "model": result.model,
@@ -438,8 +719,12 @@ async def websocket_endpoint(websocket: WebSocket):
     """WebSocket endpoint for real-time communication with binary protocol"""
     await websocket.accept()
     logger.info("WebSocket connection accepted")
+    loop = asyncio.get_running_loop()
+    sender = BatchedSender(websocket)
+    websocket.state.sender = sender
     session_state: Optional[SessionState] = None
     stt_stream: Optional[StreamingSTT] = None
+    legacy_audio_warned = False
     
     try:
         # Receive INIT message (binary or text for backward compatibility)
@@ -455,7 +740,7 @@ async def websocket_endpoint(websocket: WebSocket):
                 init_data = WebSocketProtocol.decode_json_payload(payload)
             elif "text" in message:
                 # Backward compatibility: JSON text message
-                init_data = json.loads(message["text"])
+                init_data = WebSocketProtocol.decode_json_payload(message["text"])
                 if init_data.get("type") != "init":
                     await send_error(websocket, "Expected init message")
                     return
@@ -463,7 +748,7 @@ async def websocket_endpoint(websocket: WebSocket):
                 await send_error(websocket, "Invalid message format")
                 return
             
-            session_id = init_data.get("session_id", f"session_{asyncio.get_event_loop().time()}")
+            session_id = init_data.get("session_id", f"session_{loop.time()}")
             target_lang = init_data.get("target_language", "en")
             translator_mode = init_data.get("translator_mode", False)
             
@@ -475,8 +760,8 @@ async def websocket_endpoint(websocket: WebSocket):
                 instructions=build_instructions(target_lang, translator_mode),
             )
             sessions[session_id] = session_state
-            
-            stt_language = "ko-KR" if target_lang == "ko" else "en-US"
+            session_state.turn_queue = asyncio.Queue(maxsize=2)
+            session_state.llm_task = asyncio.create_task(generation_worker(session_state, websocket))
             
             async def on_interim(text: str):
                 await handle_interim_transcript(websocket, text)
@@ -486,7 +771,7 @@ async def websocket_endpoint(websocket: WebSocket):
             
             stt_stream = StreamingSTT(
                 session_state=session_state,
-                language_code=stt_language,
+                language_code=session_state.language_code,
                 sample_rate=settings.stt_sample_rate_hz,
                 on_interim=on_interim,
                 on_final=on_final,
@@ -518,41 +803,37 @@ async def websocket_endpoint(websocket: WebSocket):
                     # Handle binary messages
                     if "bytes" in message:
                         try:
-                            msg_type, payload = WebSocketProtocol.parse_message(message["bytes"])
+                            # Each received frame is a fresh immutable bytes object, so a view is safe to queue
+                            msg_type, payload = WebSocketProtocol.parse_message(message["bytes"], zero_copy=True)
                             
                             if msg_type == WebSocketProtocol.AUDIO_FRAME:
+                                frame_ts = time.perf_counter()
                                 if session_state.turn_started_at is None:
-                                    session_state.begin_turn(time.perf_counter())
+                                    session_state.begin_turn(frame_ts)
                                 session_state.turn_audio_bytes += len(payload)
 
                                 if session_state.turn_audio_bytes > settings.max_audio_bytes:
                                     await send_error(websocket, "Audio payload too large for a single turn.", code=413)
                                     continue
-                                if session_state.turn_started_at and (time.perf_counter() - session_state.turn_started_at) > settings.turn_max_seconds:
+                                if session_state.turn_started_at and (frame_ts - session_state.turn_started_at) > settings.turn_max_seconds:
                                     await send_error(websocket, "Turn exceeded maximum duration. Please ask in shorter segments.", code=413)
                                     continue
                                 
                                 if session_state.should_drop_frame():
                                     session_state.dropped_frames += 1
-                                    logger.warning(f"Dropping frame due to backpressure (queue size: {session_state.audio_queue.qsize()})")
+                                    logger.warning(f"Dropping frame due to backpressure (queue size: {session_state.audio_ring.qsize()})")
                                 else:
-                                    await session_state.audio_queue.put(payload)
-                                    session_state.last_audio_time = asyncio.get_event_loop().time()
-                                    logger.debug(f"Received audio frame: {len(payload)} bytes, queue size: {session_state.audio_queue.qsize()}")
+                                    session_state.audio_ring.put_nowait(payload)
+                                    session_state.last_audio_time = loop.time()
+                                    logger.debug(f"Received audio frame: {len(payload)} bytes, queue size: {session_state.audio_ring.qsize()}")
                             
                             elif msg_type == WebSocketProtocol.SPEECH_START:
                                 now_ts = time.perf_counter()
                                 session_state.begin_turn(now_ts)
                                 session_state.increment_generation_id()
-                                if session_state.active_generation_cancel_event:
-                                    session_state.active_generation_cancel_event.set()
-                                if session_state.llm_task and not session_state.llm_task.done():
-                                    session_state.llm_task.cancel()
-                                if session_state.tts_task and not session_state.tts_task.done():
-                                    session_state.tts_task.cancel()
-                                session_state.cancel_event.set()
+                                session_state.cancel_in_flight_turn()
                                 session_state.is_tts_playing = False
-                                session_state.last_audio_time = asyncio.get_event_loop().time()
+                                session_state.last_audio_time = loop.time()
                             
                             elif msg_type == WebSocketProtocol.SPEECH_END:
                                 logger.info("Speech end detected")
@@ -560,30 +841,21 @@ async def websocket_endpoint(websocket: WebSocket):
                             elif msg_type == WebSocketProtocol.BARGE_IN:
                                 # User interrupted - cancel everything
                                 logger.info("Barge-in detected")
-                                if session_state.active_generation_cancel_event:
-                                    session_state.active_generation_cancel_event.set()
-                                session_state.cancel_event.set()
                                 session_state.increment_generation_id()
-                                
-                                # Cancel tasks
-                                if session_state.llm_task and not session_state.llm_task.done():
-                                    session_state.llm_task.cancel()
-                                if session_state.tts_task and not session_state.tts_task.done():
-                                    session_state.tts_task.cancel()
-                                
+                                # Interrupt an in-flight LLM call; everything else checks the generation id
+                                session_state.cancel_in_flight_turn()
                                 session_state.is_tts_playing = False
                             
                             elif msg_type == WebSocketProtocol.CONFIG_UPDATE:
                                 config_data = WebSocketProtocol.decode_json_payload(payload)
-                                session_state.target_language = config_data.get("target_language", session_state.target_language)
+                                session_state.set_target_language(config_data.get("target_language", session_state.target_language))
                                 session_state.translator_mode = config_data.get("translator_mode", session_state.translator_mode)
                                 session_state.instructions = build_instructions(
                                     session_state.target_language,
                                     session_state.translator_mode
                                 )
                                 
-                                new_stt_language = "ko-KR" if session_state.target_language == "ko" else "en-US"
-                                if stt_stream and stt_stream.language_code != new_stt_language:
+                                if stt_stream and stt_stream.language_code != session_state.language_code:
                                     if session_state.stt_task and not session_state.stt_task.done():
                                         session_state.stt_task.cancel()
                                     stt_stream.close()
@@ -596,7 +868,7 @@ async def websocket_endpoint(websocket: WebSocket):
                                     
                                     stt_stream = StreamingSTT(
                                         session_state=session_state,
-                                        language_code=new_stt_language,
+                                        language_code=session_state.language_code,
                                         sample_rate=settings.stt_sample_rate_hz,
                                         on_interim=on_interim,
                                         on_final=on_final,
@@ -606,16 +878,18 @@ async def websocket_endpoint(websocket: WebSocket):
                                     session_state.stt_task = asyncio.create_task(stt_stream.process_audio_queue())
                                     session_state._stt_response_task = asyncio.create_task(stt_stream.handle_responses())
                                 
-                                await send_json_message(websocket, WebSocketProtocol.CONFIG_UPDATED, {
-                                    "status": "ok"
-                                })
+                                await send_encoded_message(websocket, CONFIG_UPDATED_FRAME)
                             
                             elif msg_type == WebSocketProtocol.IMAGE_UPLOAD:
                                 image_data = WebSocketProtocol.decode_json_payload(payload)
                                 session_state.uploaded_image = image_data.get("image_data")
-                                await send_json_message(websocket, WebSocketProtocol.IMAGE_RECEIVED, {
-                                    "status": "ready"
-                                })
+                                # Parse the (possibly multi-MB) data URL once here rather than on every turn.
+                                session_state.uploaded_image_parts = (
+                                    _split_image_data_url(session_state.uploaded_image)
+                                    if session_state.uploaded_image
+                                    else None
+                                )
+                                await send_encoded_message(websocket, IMAGE_RECEIVED_FRAME)
                                 logger.info("Image uploaded")
                             
                             elif msg_type == WebSocketProtocol.REQUEST_NOTES:
@@ -638,8 +912,8 @@ async def websocket_endpoint(websocket: WebSocket):
                                             translator_mode=session_state.translator_mode,
                                             on_token=None,
                                         )
-                                        structured = parse_structured_json(result.raw_text) or result.structured or safe_structured_fallback(session_state.target_language)
-                                        await send_json_message(websocket, WebSocketProtocol.NOTES, {"text": json.dumps(structured, ensure_ascii=False, indent=2)})
+                                        structured = result.structured or safe_structured_fallback(session_state.target_language)
+                                        await send_encoded_message(websocket, _notes_frame(structured))
                                     except Exception as e:
                                         logger.error(f"Error generating notes: {e}")
                                         await send_error(websocket, f"Error generating notes: {str(e)}")
@@ -656,7 +930,7 @@ async def websocket_endpoint(websocket: WebSocket):
                     # Handle text messages (backward compatibility)
                     elif "text" in message:
                         try:
-                            data = json.loads(message["text"])
+                            data = WebSocketProtocol.decode_json_payload(message["text"])
                             msg_type_str = data.get("type")
                             
                             # Map text message types to binary protocol
@@ -664,11 +938,14 @@ async def websocket_endpoint(websocket: WebSocket):
                                 # Legacy: base64 audio - decode and queue
                                 audio_b64 = data.get("audio_data")
                                 if audio_b64:
-                                    import base64
-                                    audio_bytes = base64.b64decode(audio_b64)
+                                    if not legacy_audio_warned:
+                                        # Once per connection, not per frame: clients should move to AUDIO_FRAME (0x01).
+                                        logger.warning("Legacy base64 audio_chunk text messages in use; send binary AUDIO_FRAME instead")
+                                        legacy_audio_warned = True
+                                    audio_bytes = a2b_base64(audio_b64)
                                     if not session_state.should_drop_frame():
-                                        await session_state.audio_queue.put(audio_bytes)
-                                        session_state.last_audio_time = asyncio.get_event_loop().time()
+                                        session_state.audio_ring.put_nowait(audio_bytes)
+                                        session_state.last_audio_time = loop.time()
                             
                             elif msg_type_str in ["image_upload", "update_config", "request_notes"]:
                                 # Handle as binary protocol would
@@ -716,19 +993,17 @@ async def websocket_endpoint(websocket: WebSocket):
                 pass  # WebSocket might be closed
     
     except WebSocketDisconnect:
-        logger.info(f"WebSocket disconnected: {session_id if 'session_id' in locals() else 'unknown'}")
+        logger.info(f"WebSocket disconnected: {session_state.session_id if session_state else 'unknown'}")
     except Exception as e:
         logger.error(f"WebSocket endpoint error: {e}")
     finally:
         # Cleanup
-        session_id_to_cleanup = session_id if 'session_id' in locals() else None
+        session_id_to_cleanup = session_state.session_id if session_state else None
         if session_state:
             try:
-                session_state.cleanup()
+                await session_state.cleanup()
             except Exception as e:
                 logger.error(f"Error during session cleanup: {e}")
-            if session_state.session_id in sessions:
-                del sessions[session_state.session_id]
             logger.info(f"Session cleaned up: {session_state.session_id}")
         
         if stt_stream:
@@ -737,12 +1012,35 @@ async def websocket_endpoint(websocket: WebSocket):
             except Exception as e:
                 logger.error(f"Error closing STT stream: {e}")
         
+        await sender.close()
         logger.info(f"WebSocket connection closed for session: {session_id_to_cleanup}")
 
 
+def _warm_up_google_clients(timeout_s: float = 5.0) -> None:
+    """Connect the shared Speech and TTS channels so the first session doesn't pay for the handshake."""
+    try:
+        # Free metadata call: connects the channel and fetches the auth token
+        tts_client.list_voices(language_code="en-US", timeout=timeout_s)
+    except Exception:
+        pass
+    try:
+        # No free Speech RPC; connecting the channel covers DNS + TLS
+        grpc.channel_ready_future(speech_client.transport.grpc_channel).result(timeout=timeout_s)
+    except Exception:
+        pass
+
+
+@app.on_event("startup")
+async def startup_event():
+    warm_ups = [asyncio.to_thread(_warm_up_google_clients)]
+    if claude_client is not None:
+        warm_ups.append(claude_client.warm_up())
+    await asyncio.gather(*warm_ups)
+
+
 @app.on_event("shutdown")
 async def shutdown_event():
-    for session_state in list(sessions.values()):
-        session_state.cleanup()
-    sessions.clear()
+    await asyncio.gather(
+        *(session_state.cleanup() for session_state in list(sessions.values())), return_exceptions=True
+    )
     logger.info("All sessions cleaned up")
@@ -1 +0,0 @@
-# Agent runtime package shim
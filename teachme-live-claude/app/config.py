@@ -1,4 +1,3 @@
-from functools import lru_cache
 import os
 
 from pydantic import Field
@@ -38,10 +37,10 @@ class Settings(BaseSettings):
 
     stt_sample_rate_hz: int = Field(default=16000, alias="STT_SAMPLE_RATE_HZ")
     tts_sample_rate_hz: int = Field(default=24000, alias="TTS_SAMPLE_RATE_HZ")
+    streaming_tts_enabled: bool = Field(default=False, alias="STREAMING_TTS_ENABLED")
 
 
-@lru_cache(maxsize=1)
-def get_settings() -> Settings:
+def _load_settings() -> Settings:
     try:
         return Settings()
     except Exception:
@@ -68,7 +67,13 @@ def get_settings() -> Settings:
             max_audio_bytes=int(os.getenv("MAX_AUDIO_BYTES", "2400000")),
             stt_sample_rate_hz=int(os.getenv("STT_SAMPLE_RATE_HZ", "16000")),
             tts_sample_rate_hz=int(os.getenv("TTS_SAMPLE_RATE_HZ", "24000")),
+            streaming_tts_enabled=os.getenv("STREAMING_TTS_ENABLED", "false").lower() == "true",
         )
 
 
-settings = get_settings()
+# Resolved once at import; settings do not change after startup.
+settings = _load_settings()
+
+
+def get_settings() -> Settings:
+    return settings
@@ -1,5 +1,6 @@
 import asyncio
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from functools import cached_property
 from typing import Any, AsyncIterator, Awaitable, Callable
 
 from anthropic import AsyncAnthropic
@@ -13,11 +14,30 @@ except ImportError:  # pragma: no cover - package import fallback
 @dataclass
 class ClaudeResponse:
     text: str
-    content: list[dict[str, Any]]
+    blocks: list[Any]  # content blocks as returned by the SDK
     model: str
     request_id: str | None
     input_tokens: int
     output_tokens: int
+    has_tool_use: bool = False
+
+    @cached_property
+    def content(self) -> list[dict[str, Any]]:
+        # Dumped lazily: only tool-use rounds need the blocks as plain dicts.
+        return [block if isinstance(block, dict) else block.model_dump() for block in self.blocks]
+
+
+def _scan_blocks(blocks: list[Any]) -> tuple[str, bool]:
+    """Joined text and whether any tool_use block is present, in one pass."""
+    text_parts: list[str] = []
+    has_tool_use = False
+    for block in blocks:
+        block_type = getattr(block, "type", "")
+        if block_type == "text":
+            text_parts.append(block.text)
+        elif block_type == "tool_use":
+            has_tool_use = True
+    return "".join(text_parts), has_tool_use
 
 
 class AnthropicClient:
@@ -25,6 +45,27 @@ class AnthropicClient:
         self._client = AsyncAnthropic(api_key=api_key)
         self._primary_model = settings.anthropic_model_primary
         self._fallback_model = settings.anthropic_model_fallback
+        self._timeout_s = max(1.0, settings.llm_request_timeout_ms / 1000.0)
+        self._max_tokens = settings.llm_max_tokens
+        self._temperature = settings.llm_temperature
+
+    async def __aenter__(self) -> "AnthropicClient":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Close the SDK's pooled HTTP connections."""
+        await self._client.close()
+
+    async def warm_up(self, timeout_s: float = 5.0) -> None:
+        """Open a pooled connection (DNS + TLS) so the first real turn doesn't pay for it."""
+        try:
+            await asyncio.wait_for(self._client.models.list(limit=1), timeout=timeout_s)
+        except Exception:
+            # Best effort: the first request simply connects on demand instead.
+            pass
 
     async def create(
         self,
@@ -36,18 +77,20 @@ class AnthropicClient:
         temperature: float | None = None,
         model: str | None = None,
     ) -> ClaudeResponse:
+        # One request dict serves both the primary attempt and the fallback retry.
         request = {
             "model": model or self._primary_model,
             "system": system,
             "messages": messages,
-            "tools": tools or [],
-            "max_tokens": max_tokens or settings.llm_max_tokens,
-            "temperature": settings.llm_temperature if temperature is None else temperature,
+            "max_tokens": max_tokens or self._max_tokens,
+            "temperature": self._temperature if temperature is None else temperature,
         }
+        if tools:
+            request["tools"] = tools
         try:
             resp = await asyncio.wait_for(
                 self._client.messages.create(**request),
-                timeout=max(1.0, settings.llm_request_timeout_ms / 1000.0),
+                timeout=self._timeout_s,
             )
         except Exception:
             if request["model"] == self._fallback_model:
@@ -55,14 +98,15 @@ class AnthropicClient:
             request["model"] = self._fallback_model
             resp = await asyncio.wait_for(
                 self._client.messages.create(**request),
-                timeout=max(1.0, settings.llm_request_timeout_ms / 1000.0),
+                timeout=self._timeout_s,
             )
 
-        text = "".join(block.text for block in resp.content if getattr(block, "type", "") == "text")
+        text, has_tool_use = _scan_blocks(resp.content)
         usage = getattr(resp, "usage", None)
         return ClaudeResponse(
             text=text,
-            content=[block.model_dump() for block in resp.content],
+            blocks=resp.content,
+            has_tool_use=has_tool_use,
             model=getattr(resp, "model", request["model"]),
             request_id=getattr(resp, "id", None),
             input_tokens=int(getattr(usage, "input_tokens", 0) or 0),
@@ -77,34 +121,47 @@ class AnthropicClient:
         on_delta: Callable[[str], Awaitable[None]] | None = None,
         max_tokens: int | None = None,
         temperature: float | None = None,
+        is_cancelled: Callable[[], bool] | None = None,
     ) -> ClaudeResponse:
         # Used for realtime experiences where partial deltas are desirable.
-        full_text = ""
+        # Joined once at the end rather than relying on CPython's in-place str += special case.
+        text_parts: list[str] = []
         request_id = None
         model = self._primary_model
         input_tokens = 0
         output_tokens = 0
+        blocks: list[Any] = []
         async with self._client.messages.stream(
             model=self._primary_model,
             system=system,
             messages=messages,
-            max_tokens=max_tokens or settings.llm_max_tokens,
-            temperature=settings.llm_temperature if temperature is None else temperature,
+            max_tokens=max_tokens or self._max_tokens,
+            temperature=self._temperature if temperature is None else temperature,
         ) as stream:
             async for delta in self.stream_message(stream):
-                full_text += delta
+                if is_cancelled is not None and is_cancelled():
+                    # Leaving the context manager closes the HTTP stream right away.
+                    return ClaudeResponse(
+                        text="".join(text_parts),
+                        blocks=blocks,
+                        model=model,
+                        request_id=request_id,
+                        input_tokens=input_tokens,
+                        output_tokens=output_tokens,
+                    )
+                text_parts.append(delta)
                 if on_delta:
                     await on_delta(delta)
             final = await stream.get_final_message()
             usage = getattr(final, "usage", None)
             input_tokens = int(getattr(usage, "input_tokens", 0) or 0)
             output_tokens = int(getattr(usage, "output_tokens", 0) or 0)
-            content = [block.model_dump() for block in getattr(final, "content", [])]
+            blocks = getattr(final, "content", None) or []
             request_id = getattr(final, "id", None)
             model = getattr(final, "model", model)
         return ClaudeResponse(
-            text=full_text,
-            content=content,
+            text="".join(text_parts),
+            blocks=blocks,
             model=model,
             request_id=request_id,
             input_tokens=input_tokens,
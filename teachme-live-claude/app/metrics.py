@@ -1,50 +1,51 @@
-from collections import deque
-from dataclasses import dataclass
-
-
-@dataclass
-class TurnMetric:
-    stt_latency_ms: float
-    llm_latency_ms: float
-    tts_latency_ms: float
-    e2e_latency_ms: float
+import numpy as np
 
 
 class MetricsTracker:
+    CAPACITY = 5000
+    # Row order of the latency ring buffer.
+    LATENCY_KEYS = ("stt_latency_ms", "llm_latency_ms", "tts_latency_ms", "end_to_end_turn_latency_ms")
+
     def __init__(self) -> None:
-        self.turns = deque(maxlen=5000)
+        # Ring buffer of the last CAPACITY turns: one contiguous row per latency channel (parallel arrays),
+        # one column per turn, so each percentile works on a contiguous slice.
+        self._latencies = np.empty((len(self.LATENCY_KEYS), self.CAPACITY), dtype=np.float64)
+        self._next = 0
+        self._count = 0
         self.tool_calls_total = 0
         self.tool_failures_total = 0
         self.transcripts_low_confidence_total = 0
+        # Latency percentiles only change when a turn is recorded; scrapes in between reuse them.
+        self._latency_snapshot: dict | None = None
 
     @staticmethod
-    def _percentile(values: list[float], p: float) -> float:
-        if not values:
-            return 0.0
-        arr = sorted(values)
-        idx = min(int(len(arr) * p), len(arr) - 1)
-        return round(arr[idx], 2)
+    def _p50_p95(values: np.ndarray) -> dict:
+        """Nearest-rank p50/p95, selected with one partial sort instead of a full one."""
+        n = len(values)
+        if not n:
+            return {"p50": 0.0, "p95": 0.0}
+        k50 = min(int(n * 0.5), n - 1)
+        k95 = min(int(n * 0.95), n - 1)
+        part = np.partition(values, (k50, k95))
+        return {"p50": round(float(part[k50]), 2), "p95": round(float(part[k95]), 2)}
 
     def record_turn(self, *, stt_latency_ms: float, llm_latency_ms: float, tts_latency_ms: float, e2e_latency_ms: float) -> None:
-        self.turns.append(
-            TurnMetric(
-                stt_latency_ms=stt_latency_ms,
-                llm_latency_ms=llm_latency_ms,
-                tts_latency_ms=tts_latency_ms,
-                e2e_latency_ms=e2e_latency_ms,
-            )
-        )
+        self._latencies[:, self._next] = (stt_latency_ms, llm_latency_ms, tts_latency_ms, e2e_latency_ms)
+        self._next = (self._next + 1) % self.CAPACITY
+        self._count = min(self._count + 1, self.CAPACITY)
+        self._latency_snapshot = None
+
+    def _latency_percentiles(self) -> dict:
+        if self._latency_snapshot is None:
+            self._latency_snapshot = {
+                key: self._p50_p95(self._latencies[row, : self._count]) for row, key in enumerate(self.LATENCY_KEYS)
+            }
+        return self._latency_snapshot
 
     def as_dict(self, active_sessions: int) -> dict:
-        stt = [t.stt_latency_ms for t in self.turns]
-        llm = [t.llm_latency_ms for t in self.turns]
-        tts = [t.tts_latency_ms for t in self.turns]
-        e2e = [t.e2e_latency_ms for t in self.turns]
+        latencies = self._latency_percentiles()
         return {
-            "stt_latency_ms": {"p50": self._percentile(stt, 0.5), "p95": self._percentile(stt, 0.95)},
-            "llm_latency_ms": {"p50": self._percentile(llm, 0.5), "p95": self._percentile(llm, 0.95)},
-            "tts_latency_ms": {"p50": self._percentile(tts, 0.5), "p95": self._percentile(tts, 0.95)},
-            "end_to_end_turn_latency_ms": {"p50": self._percentile(e2e, 0.5), "p95": self._percentile(e2e, 0.95)},
+            **{key: dict(latencies[key]) for key in self.LATENCY_KEYS},
             "tool_calls_total": self.tool_calls_total,
             "tool_failures_total": self.tool_failures_total,
             "transcripts_low_confidence_total": self.transcripts_low_confidence_total,
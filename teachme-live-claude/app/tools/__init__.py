@@ -1,6 +1,7 @@
 from .registry import (
     available_tools_for_query,
     execute_tool,
+    execute_tools,
     has_grammar_intent,
     has_math_intent,
 )
@@ -8,6 +9,7 @@ from .registry import (
 __all__ = [
     "available_tools_for_query",
     "execute_tool",
+    "execute_tools",
     "has_grammar_intent",
     "has_math_intent",
 ]
@@ -1,10 +1,10 @@
 import asyncio
 import re
 import ast
-import operator
+from functools import lru_cache
 from typing import Any
 
-from pydantic import BaseModel, Field, ValidationError
+from pydantic import BaseModel, Field
 try:
     from sympy import SympifyError, sympify
 except ImportError:  # pragma: no cover - optional dependency fallback
@@ -12,26 +12,43 @@ except ImportError:  # pragma: no cover - optional dependency fallback
     sympify = None
 
 
+# Length bounds shared by the arg models (schema) and _str_arg (runtime check).
+EXPRESSION_MAX_LENGTH = 200
+GRAMMAR_TEXT_MAX_LENGTH = 500
+
+
 class MathSolverArgs(BaseModel):
-    expression: str = Field(min_length=1, max_length=200)
+    expression: str = Field(min_length=1, max_length=EXPRESSION_MAX_LENGTH)
 
 
 class GrammarCheckArgs(BaseModel):
-    text: str = Field(min_length=1, max_length=500)
+    text: str = Field(min_length=1, max_length=GRAMMAR_TEXT_MAX_LENGTH)
     target_language: str = Field(default="en")
 
 
-def has_math_intent(text: str) -> bool:
-    q = (text or "").lower()
-    return bool(
-        re.search(r"\d+\s*[\+\-\*/\^]\s*\d+", q)
-        or any(k in q for k in ["solve", "equation", "calculate", "math", "분수", "계산"])
-    )
+# Schemas are generated once; callers share these dicts and must treat them as read-only.
+_TOOL_DEFINITIONS: dict[str, dict[str, Any]] = {
+    "math_solver": {
+        "name": "math_solver",
+        "description": "Safely solves a math expression and returns concise steps.",
+        "input_schema": MathSolverArgs.model_json_schema(),
+    },
+    "grammar_check": {
+        "name": "grammar_check",
+        "description": "Checks grammar and returns corrections with mistake explanations.",
+        "input_schema": GrammarCheckArgs.model_json_schema(),
+    },
+}
 
 
-def has_grammar_intent(text: str) -> bool:
-    q = (text or "").lower()
-    keys = [
+def _keyword_re(keys: list[str]) -> re.Pattern[str]:
+    return re.compile("|".join(re.escape(k) for k in keys), re.IGNORECASE)
+
+
+# Each intent is one precompiled alternation, so detection is a single C-level search per query.
+_MATH_RE = re.compile(r"\d+\s*[\+\-\*/\^]\s*\d+|solve|equation|calculate|math|분수|계산", re.IGNORECASE)
+_GRAMMAR_RE = _keyword_re(
+    [
         "grammar",
         "correct this",
         "proofread",
@@ -43,12 +60,9 @@ def has_grammar_intent(text: str) -> bool:
         "고쳐줘",
         "문장 교정",
     ]
-    return any(k in q for k in keys)
-
-
-def has_translation_rewrite_intent(text: str) -> bool:
-    q = (text or "").lower()
-    keys = [
+)
+_TRANSLATION_REWRITE_RE = _keyword_re(
+    [
         "translate",
         "rewrite",
         "more natural",
@@ -57,63 +71,84 @@ def has_translation_rewrite_intent(text: str) -> bool:
         "한국어로 바꿔",
         "바꿔줘",
     ]
-    return any(k in q for k in keys)
+)
 
 
-def available_tools_for_query(query: str, translator_mode: bool) -> list[dict[str, Any]]:
-    tools: list[dict[str, Any]] = []
-    if has_math_intent(query):
-        tools.append(
-            {
-                "name": "math_solver",
-                "description": "Safely solves a math expression and returns concise steps.",
-                "input_schema": MathSolverArgs.model_json_schema(),
-            }
-        )
+# All three detectors fused into one scan. The lookahead makes every match zero-width, so keywords of
+# different intents can overlap; lastgroup names whichever intent matched at each position.
+_INTENT_RE = re.compile(
+    "(?=(?:"
+    + "|".join(
+        f"(?P<{name}>{pattern.pattern})"
+        for name, pattern in (("math", _MATH_RE), ("grammar", _GRAMMAR_RE), ("rewrite", _TRANSLATION_REWRITE_RE))
+    )
+    + "))",
+    re.IGNORECASE,
+)
+
+
+def _intents(text: str) -> frozenset[str]:
+    return frozenset(match.lastgroup for match in _INTENT_RE.finditer(text or ""))
+
+
+def has_math_intent(text: str) -> bool:
+    return _MATH_RE.search(text or "") is not None
+
+
+def has_grammar_intent(text: str) -> bool:
+    return _GRAMMAR_RE.search(text or "") is not None
+
+
+def has_translation_rewrite_intent(text: str) -> bool:
+    return _TRANSLATION_REWRITE_RE.search(text or "") is not None
+
+
+@lru_cache(maxsize=512)
+def _tool_names_for_query(query: str, translator_mode: bool) -> tuple[str, ...]:
+    intents = _intents(query)
+    names: list[str] = []
+    if "math" in intents:
+        names.append("math_solver")
     # Keep high precision but recover recall in translator scenarios for rewrite intent.
-    if has_grammar_intent(query) or (translator_mode and has_translation_rewrite_intent(query)):
-        tools.append(
-            {
-                "name": "grammar_check",
-                "description": "Checks grammar and returns corrections with mistake explanations.",
-                "input_schema": GrammarCheckArgs.model_json_schema(),
-            }
-        )
-    return tools
+    if "grammar" in intents or (translator_mode and "rewrite" in intents):
+        names.append("grammar_check")
+    return tuple(names)
 
 
-def _solve_math(args: MathSolverArgs) -> dict[str, Any]:
-    normalized = args.expression.replace("^", "**")
+def available_tools_for_query(query: str, translator_mode: bool) -> list[dict[str, Any]]:
+    return [_TOOL_DEFINITIONS[name] for name in _tool_names_for_query(query, translator_mode)]
+
+
+# Everything the sympy-less fallback accepts: numeric literals and + - * / ** and unary minus.
+_FALLBACK_MATH_NODES = frozenset(
+    {ast.Expression, ast.Constant, ast.BinOp, ast.UnaryOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.USub}
+)
+
+
+@lru_cache(maxsize=256)
+def _eval_expr(normalized: str) -> str:
+    # Safe to memoize: inputs are capped at 200 chars by MathSolverArgs and results are plain strings.
     if sympify is not None:
         try:
-            expr = sympify(normalized, evaluate=True)
-            result = str(expr)
+            return str(sympify(normalized, evaluate=True))
         except (SympifyError, TypeError) as exc:
             raise ValueError(f"Unable to parse expression safely: {exc}") from exc
-    else:
-        allowed = {
-            ast.Add: operator.add,
-            ast.Sub: operator.sub,
-            ast.Mult: operator.mul,
-            ast.Div: operator.truediv,
-            ast.Pow: operator.pow,
-            ast.USub: operator.neg,
-        }
-
-        def _eval(node):
-            if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)):
-                return node.value
-            if isinstance(node, ast.BinOp) and type(node.op) in allowed:
-                return allowed[type(node.op)](_eval(node.left), _eval(node.right))
-            if isinstance(node, ast.UnaryOp) and type(node.op) in allowed:
-                return allowed[type(node.op)](_eval(node.operand))
-            raise ValueError("Unsupported expression")
+    try:
+        parsed = ast.parse(normalized, mode="eval")
+        for node in ast.walk(parsed):
+            if type(node) not in _FALLBACK_MATH_NODES or (
+                isinstance(node, ast.Constant) and not isinstance(node.value, (int, float))
+            ):
+                raise ValueError("Unsupported expression")
+        # The tree is validated once above, then runs as ordinary bytecode with no builtins.
+        return str(eval(compile(parsed, "<math>", "eval"), {"__builtins__": {}}, {}))
+    except Exception as exc:
+        raise ValueError(f"Unable to parse expression safely: {exc}") from exc
 
-        try:
-            parsed = ast.parse(normalized, mode="eval")
-            result = str(_eval(parsed.body))
-        except Exception as exc:
-            raise ValueError(f"Unable to parse expression safely: {exc}") from exc
+
+def _solve_math(args: MathSolverArgs) -> dict[str, Any]:
+    normalized = args.expression.replace("^", "**")
+    result = _eval_expr(normalized)
     steps = [
         f"Normalize expression: {args.expression}",
         f"Compute with symbolic parser: {normalized}",
@@ -154,21 +189,47 @@ def _grammar_check(args: GrammarCheckArgs) -> dict[str, Any]:
     }
 
 
+def _str_arg(raw_args: Any, key: str, min_length: int = 0, max_length: int | None = None, default: str | None = None) -> str:
+    """Same checks the arg models declare, without a full Pydantic validation pass per call."""
+    value = raw_args.get(key, default) if isinstance(raw_args, dict) else None
+    if not isinstance(value, str):
+        raise ValueError(f"{key}: expected a string")
+    if len(value) < min_length or (max_length is not None and len(value) > max_length):
+        raise ValueError(f"{key}: length must be between {min_length} and {max_length}")
+    return value
+
+
 def execute_tool(name: str, raw_args: dict[str, Any]) -> dict[str, Any]:
     if name == "math_solver":
-        try:
-            args = MathSolverArgs.model_validate(raw_args)
-        except ValidationError as exc:
-            raise ValueError(str(exc)) from exc
+        args = MathSolverArgs.model_construct(expression=_str_arg(raw_args, "expression", 1, EXPRESSION_MAX_LENGTH))
         return _solve_math(args)
     if name == "grammar_check":
-        try:
-            args = GrammarCheckArgs.model_validate(raw_args)
-        except ValidationError as exc:
-            raise ValueError(str(exc)) from exc
+        args = GrammarCheckArgs.model_construct(
+            text=_str_arg(raw_args, "text", 1, GRAMMAR_TEXT_MAX_LENGTH),
+            target_language=_str_arg(raw_args, "target_language", default="en"),
+        )
         return _grammar_check(args)
     raise ValueError(f"Tool not allowed: {name}")
 
 
 async def execute_tool_with_timeout(name: str, raw_args: dict[str, Any], timeout_ms: int) -> dict[str, Any]:
     return await asyncio.wait_for(asyncio.to_thread(execute_tool, name, raw_args), timeout=max(0.1, timeout_ms / 1000.0))
+
+
+async def execute_tools(specs: list[tuple[str, dict[str, Any]]], timeout_ms: int) -> list[Any]:
+    """
+    Run several tool calls concurrently under one shared deadline.
+    Each slot holds the tool's result, or the exception it raised (TimeoutError if it missed the deadline).
+    """
+    tasks = [asyncio.ensure_future(asyncio.to_thread(execute_tool, name, args)) for name, args in specs]
+    if not tasks:
+        return []
+    try:
+        await asyncio.wait(tasks, timeout=max(0.1, timeout_ms / 1000.0))
+    finally:
+        for task in tasks:
+            task.cancel()
+    return [
+        task.exception() or task.result() if task.done() and not task.cancelled() else asyncio.TimeoutError()
+        for task in tasks
+    ]
@@ -1,17 +1,39 @@
 import argparse
 import asyncio
+import contextlib
+import functools
 import json
 import os
-import statistics
+import re
 import time
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any, Iterable
 
 import sys
 
+import numpy as np
+
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+
+    def _json_dumps(obj: Any, indent: bool = False) -> str:
+        # orjson emits UTF-8 without escaping non-ASCII, matching ensure_ascii=False.
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0).decode("utf-8")
+
+except ImportError:  # pragma: no cover - optional speedup
+    _json_loads = json.loads
+
+    def _json_dumps(obj: Any, indent: bool = False) -> str:
+        return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False)
+
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from agent.runtime import STRUCTURED_KEYS
 from agent.runtime import parse_structured_json
 from agent.runtime import run_tutor_turn
 from app.config import settings
@@ -20,41 +42,40 @@ from app.tools.registry import available_tools_for_query
 
 def load_cases() -> list[dict]:
     path = ROOT / "evals" / "test_cases.jsonl"
-    with path.open("r", encoding="utf-8") as f:
-        return [json.loads(line) for line in f if line.strip()]
+    # Parse straight from bytes: orjson reads UTF-8 natively, so no per-line str decode.
+    return [_json_loads(line) for line in path.read_bytes().splitlines() if line.strip()]
+
+
+_OFFLINE_MOCK = '{"answer":"Mock tutoring answer","steps":["Step 1","Step 2"],"examples":["Example A"],"common_mistakes":["Mistake A"],"next_exercises":["Exercise A"]}'
+_GUARD_EN = '{"answer":"If this is about an image, please upload it first.","steps":[],"examples":[],"common_mistakes":[],"next_exercises":[]}'
+_GUARD_KO = '{"answer":"이미지 관련 질문이면 먼저 이미지를 업로드해 주세요.","steps":[],"examples":[],"common_mistakes":[],"next_exercises":[]}'
+# Offline output is one of three constants, so each is parsed once here instead of per case.
+_OFFLINE_PARSED = {text: parse_structured_json(text) for text in (_OFFLINE_MOCK, _GUARD_EN, _GUARD_KO)}
 
 
 def offline_response(case: dict) -> str:
-    target = case.get("target_language", "en")
     if case.get("expect_guardrail"):
-        return (
-            '{"answer":"If this is about an image, please upload it first.","steps":[],"examples":[],"common_mistakes":[],"next_exercises":[]}'
-            if target == "en"
-            else '{"answer":"이미지 관련 질문이면 먼저 이미지를 업로드해 주세요.","steps":[],"examples":[],"common_mistakes":[],"next_exercises":[]}'
-        )
-    return json.dumps(
-        {
-            "answer": "Mock tutoring answer",
-            "steps": ["Step 1", "Step 2"],
-            "examples": ["Example A"],
-            "common_mistakes": ["Mistake A"],
-            "next_exercises": ["Exercise A"],
-        },
-        ensure_ascii=False,
-    )
+        return _GUARD_EN if case.get("target_language", "en") == "en" else _GUARD_KO
+    return _OFFLINE_MOCK
+
 
+# Guardrail answers must point the user at an image upload; one case-insensitive scan, no lowercased copy.
+_GUARD_RE = re.compile(r"upload|이미지", re.IGNORECASE)
 
-def mock_stream_events(case: dict) -> list[dict]:
-    if case.get("expect_llm_delta_before_final"):
-        return [
-            {"type": "llm_delta", "text": "{", "final": False},
-            {"type": "llm_delta", "text": '"answer":"mock"', "final": False},
-            {"type": "llm_delta", "text": "}", "final": True},
-        ]
-    return [{"type": "llm_delta", "text": "", "final": True}]
+# Mock stream shapes are fixed, so they are built once and shared read-only across cases.
+_EVENTS_WITH_DELTA = (
+    {"type": "llm_delta", "text": "{", "final": False},
+    {"type": "llm_delta", "text": '"answer":"mock"', "final": False},
+    {"type": "llm_delta", "text": "}", "final": True},
+)
+_EVENTS_FINAL_ONLY = ({"type": "llm_delta", "text": "", "final": True},)
 
 
-def llm_delta_before_final(events: list[dict]) -> bool:
+def mock_stream_events(case: dict) -> tuple[dict, ...]:
+    return _EVENTS_WITH_DELTA if case.get("expect_llm_delta_before_final") else _EVENTS_FINAL_ONLY
+
+
+def llm_delta_before_final(events: Iterable[dict]) -> bool:
     saw_non_final = False
     for ev in events:
         if ev.get("type") != "llm_delta":
@@ -66,15 +87,17 @@ def llm_delta_before_final(events: list[dict]) -> bool:
     return False
 
 
+# Structured-output schema: every key required, "answer" a string, the rest lists.
+_REQUIRED = frozenset(STRUCTURED_KEYS)
+_LIST_KEYS = tuple(key for key in STRUCTURED_KEYS if key != "answer")
+
+
 def _is_valid_structured(obj: dict | None) -> bool:
-    if not isinstance(obj, dict):
-        return False
-    keys = ["answer", "steps", "examples", "common_mistakes", "next_exercises"]
-    if not all(k in obj for k in keys):
+    if not isinstance(obj, dict) or not _REQUIRED <= obj.keys():
         return False
-    if not isinstance(obj.get("answer"), str):
+    if not isinstance(obj["answer"], str):
         return False
-    return all(isinstance(obj.get(k), list) for k in keys[1:])
+    return all(isinstance(obj[key], list) for key in _LIST_KEYS)
 
 
 async def full_response(client, case: dict) -> dict:
@@ -94,10 +117,110 @@ async def full_response(client, case: dict) -> dict:
     }
 
 
+def _latency_summary(latencies_ns: np.ndarray) -> dict:
+    """Mean and nearest-rank p50/p95/p99 in ms, from one partial sort (same ranks as app/metrics.py)."""
+    n = len(latencies_ns)
+    if not n:
+        return {"avg_latency_ms": 0.0, "p50_latency_ms": 0.0, "p95_latency_ms": 0.0, "p99_latency_ms": 0.0}
+    values = np.asarray(latencies_ns, dtype=np.int64)
+    ranks = {pct: min(int(n * pct / 100), n - 1) for pct in (50, 95, 99)}
+    part = np.partition(values, tuple(ranks.values()))
+    return {
+        "avg_latency_ms": round(float(values.mean()) / 1e6, 2),
+        **{f"p{pct}_latency_ms": round(int(part[k]) / 1e6, 2) for pct, k in ranks.items()},
+    }
+
+
+@functools.lru_cache(maxsize=1024)
+def _offered(query: str, translator_mode: bool) -> tuple[str, ...]:
+    # Tool gating is deterministic, so replayed (query, mode) pairs reuse the names.
+    return tuple(t["name"] for t in available_tools_for_query(query, translator_mode))
+
+
+@dataclass(slots=True)
+class CaseResult:
+    id: str
+    mode: str
+    latency_ns: int
+    format_valid: bool
+    offered_tools: list[str]
+    expected_tool: str
+    guardrail_expected: bool
+    llm_delta_order_ok: bool
+    # Scoring-only fields: counted into the summary, not written to the row.
+    format_ok: bool
+    guardrail_ok: bool
+    error: str | None = None
+
+    def as_row(self) -> dict:
+        row = {
+            "id": self.id,
+            "mode": self.mode,
+            "latency_ms": round(self.latency_ns / 1e6, 2),
+            "format_valid": self.format_valid,
+            "offered_tools": self.offered_tools,
+            "expected_tool": self.expected_tool,
+            "guardrail_expected": self.guardrail_expected,
+            "llm_delta_order_ok": self.llm_delta_order_ok,
+        }
+        if self.error is not None:
+            row["error"] = self.error
+        return row
+
+
+async def _process_case(case: dict, mode: str, client) -> CaseResult:
+    error = None
+    t0 = time.perf_counter_ns()
+    if client is None:
+        out = offline_response(case)
+        structured_obj = _OFFLINE_PARSED[out]
+    else:
+        try:
+            full_out = await full_response(client, case)
+            out = full_out["raw_text"]
+            structured_obj = full_out.get("structured")
+        except Exception as exc:
+            # A failed request fails its own case instead of aborting the other in-flight cases.
+            out, structured_obj, error = "", None, str(exc) or type(exc).__name__
+    latency_ns = time.perf_counter_ns() - t0
+
+    if _is_valid_structured(structured_obj):
+        parsed = structured_obj
+    elif structured_obj is None:
+        parsed = parse_structured_json(out)
+    else:
+        # structured_obj was already parsed from `out` and rejected; parsing the same text again can't change that.
+        parsed = None
+    offered_names = list(_offered(case["input"], bool(case.get("translator_mode"))))
+
+    if case.get("expect_guardrail"):
+        guardrail_ok = _GUARD_RE.search((parsed or {}).get("answer", out)) is not None
+    else:
+        guardrail_ok = True
+
+    # Computed once per case and reused for both the summary count and the row.
+    order_ok = not case.get("expect_llm_delta_before_final") or llm_delta_before_final(mock_stream_events(case))
+
+    return CaseResult(
+        id=case["id"],
+        mode=mode,
+        latency_ns=latency_ns,
+        format_valid=parsed is not None,
+        offered_tools=offered_names,
+        expected_tool=case.get("expect_tool", ""),
+        guardrail_expected=bool(case.get("expect_guardrail")),
+        llm_delta_order_ok=order_ok,
+        format_ok=parsed is not None and _is_valid_structured(parsed),
+        guardrail_ok=guardrail_ok,
+        error=error,
+    )
+
+
 async def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("--mode", default=os.getenv("EVAL_MODE", "offline"), choices=["offline", "full"])
     parser.add_argument("--suite", default="default")
+    parser.add_argument("--output-format", default="json", choices=["json", "jsonl"])
     args = parser.parse_args()
 
     cases = load_cases()
@@ -111,71 +234,58 @@ async def main() -> None:
     if args.mode == "full" and settings.anthropic_api_key:
         from app.llm.anthropic_client import AnthropicClient
 
+        # One client for the whole run: every case shares its connection pool.
         client = AnthropicClient(settings.anthropic_api_key)
-    format_ok = 0
-    tool_tp = 0
-    tool_fp = 0
-    tool_fn = 0
-    guardrail_pass = 0
-    stream_order_pass = 0
-    latencies = []
-    rows = []
-
-    for case in cases:
-        t0 = time.perf_counter()
-        if args.mode == "offline":
-            out = offline_response(case)
-            structured_obj = parse_structured_json(out)
-        else:
-            if client is None:
-                out = offline_response(case)
-                structured_obj = parse_structured_json(out)
-            else:
-                full_out = await full_response(client, case)
-                out = full_out["raw_text"]
-                structured_obj = full_out.get("structured")
-        latency_ms = (time.perf_counter() - t0) * 1000
-        latencies.append(latency_ms)
-
-        parsed = structured_obj if _is_valid_structured(structured_obj) else parse_structured_json(out)
-        format_ok += int(parsed is not None and _is_valid_structured(parsed))
-
-        offered = available_tools_for_query(case["input"], bool(case.get("translator_mode")))
-        offered_names = [t["name"] for t in offered]
-        expected = case.get("expect_tool", "")
-        if expected:
-            if expected in offered_names:
-                tool_tp += 1
-            else:
-                tool_fn += 1
-        else:
-            tool_fp += int(len(offered_names) > 0)
-
-        if case.get("expect_guardrail"):
-            check_text = (parsed or {}).get("answer", out).lower()
-            guardrail_pass += int("upload" in check_text or "이미지" in check_text)
-        else:
-            guardrail_pass += 1
-
-        if case.get("expect_llm_delta_before_final"):
-            stream_order_pass += int(llm_delta_before_final(mock_stream_events(case)))
-        else:
-            stream_order_pass += 1
-
-        rows.append(
-            {
-                "id": case["id"],
-                "mode": args.mode,
-                "latency_ms": round(latency_ms, 2),
-                "format_valid": bool(parsed is not None),
-                "offered_tools": offered_names,
-                "expected_tool": expected,
-                "guardrail_expected": bool(case.get("expect_guardrail")),
-                "llm_delta_order_ok": not case.get("expect_llm_delta_before_final")
-                or llm_delta_before_final(mock_stream_events(case)),
-            }
-        )
 
+    n = len(cases)
+    latencies_ns = np.empty(n, dtype=np.int64)
+    # One boolean per case and predicate, filled by case index; the summary counts are array sums.
+    format_ok = np.zeros(n, dtype=bool)
+    expects_tool = np.zeros(n, dtype=bool)
+    expected_offered = np.zeros(n, dtype=bool)
+    any_offered = np.zeros(n, dtype=bool)
+    guardrail_ok = np.zeros(n, dtype=bool)
+    order_ok = np.zeros(n, dtype=bool)
+    jsonl = args.output_format == "jsonl"
+    # json output needs every row at the end; slots keep them in test_cases.jsonl order.
+    rows: list[dict | None] = [] if jsonl else [None] * n
+    evals_dir = ROOT / "evals"
+    # At most EVAL_CONCURRENCY workers, each pulling the next case when its current one finishes.
+    concurrency = max(1, int(os.getenv("EVAL_CONCURRENCY", "8")))
+    pending = iter(enumerate(cases))
+
+    try:
+        # jsonl: one row per line, written in completion order, with the summary in its own file.
+        rows_path = evals_dir / "results.jsonl"
+        with rows_path.open("w", encoding="utf-8") if jsonl else contextlib.nullcontext() as rows_file:
+
+            def record(i: int, result: CaseResult) -> None:
+                # Scored as soon as the case finishes, so no CaseResult outlives its own case.
+                latencies_ns[i] = result.latency_ns
+                format_ok[i] = result.format_ok
+                expects_tool[i] = bool(result.expected_tool)
+                expected_offered[i] = result.expected_tool in result.offered_tools
+                any_offered[i] = bool(result.offered_tools)
+                guardrail_ok[i] = result.guardrail_ok
+                order_ok[i] = result.llm_delta_order_ok
+                if rows_file is not None:
+                    rows_file.write(_json_dumps(result.as_row()) + "\n")
+                else:
+                    rows[i] = result.as_row()
+
+            async def worker() -> None:
+                # Workers share one iterator; next() never awaits, so each case is taken exactly once.
+                for i, case in pending:
+                    record(i, await _process_case(case, args.mode, client))
+
+            await asyncio.gather(*(worker() for _ in range(min(concurrency, n))))
+    finally:
+        if client is not None:
+            await client.aclose()
+
+    tool_tp = int(np.count_nonzero(expects_tool & expected_offered))
+    tool_fn = int(np.count_nonzero(expects_tool & ~expected_offered))
+    tool_fp = int(np.count_nonzero(~expects_tool & any_offered))
     total = len(cases) or 1
     tool_precision = tool_tp / max(1, (tool_tp + tool_fp))
     tool_recall = tool_tp / max(1, (tool_tp + tool_fn))
@@ -183,16 +293,20 @@ async def main() -> None:
         "mode": args.mode,
         "suite": args.suite,
         "cases": len(cases),
-        "format_valid_rate": round(format_ok / total, 4),
+        "format_valid_rate": round(int(np.count_nonzero(format_ok)) / total, 4),
         "tool_precision": round(tool_precision, 4),
         "tool_recall": round(tool_recall, 4),
-        "guardrail_pass_rate": round(guardrail_pass / total, 4),
-        "llm_delta_order_pass_rate": round(stream_order_pass / total, 4),
-        "avg_latency_ms": round(statistics.mean(latencies), 2) if latencies else 0.0,
+        "guardrail_pass_rate": round(int(np.count_nonzero(guardrail_ok)) / total, 4),
+        "llm_delta_order_pass_rate": round(int(np.count_nonzero(order_ok)) / total, 4),
+        **_latency_summary(latencies_ns),
     }
-    output = {"summary": summary, "cases": rows}
-    out_path = ROOT / "evals" / "results.json"
-    out_path.write_text(json.dumps(output, indent=2, ensure_ascii=False), encoding="utf-8")
+    if jsonl:
+        out_path = evals_dir / "results_summary.json"
+        output = summary
+    else:
+        out_path = evals_dir / "results.json"
+        output = {"summary": summary, "cases": rows}
+    out_path.write_text(_json_dumps(output, indent=True), encoding="utf-8")
 
     print("Evaluation Summary")
     print("==================")
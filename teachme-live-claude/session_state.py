@@ -2,37 +2,110 @@
 # Session state management for realtime voice tutoring
 
 import asyncio
+import logging
+from collections import deque
 from dataclasses import dataclass, field
-from typing import Optional, List, Dict, Any
+from itertools import count
+from typing import Optional, List, Dict, Any, Deque, Iterator, Union
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+# BCP-47 codes for Google STT/TTS; anything unmapped falls back to English
+_LANGUAGE_CODES = {"ko": "ko-KR", "en": "en-US"}
+
+
+class AudioRing:
+    """Bounded FIFO of audio frames: a preallocated slot list indexed by head/tail counters.
+
+    Single producer (websocket receive loop) and single consumer (STT task), both on the
+    event loop, so no locking is needed; one Event wakes the consumer when frames arrive.
+    Deadline wakeups (wake()) are a flag, not a slot: they never fill the ring or get dropped.
+    """
+    __slots__ = ("buf", "cap", "head", "tail", "event", "wake_pending")
+
+    WAKE = object()  # returned by get() for a wake() once the queued frames are drained
+
+    def __init__(self, cap: int):
+        self.buf: List[Optional[Union[bytes, memoryview]]] = [None] * cap
+        self.cap = cap
+        self.head = 0  # next slot to read (monotonic; index is head % cap)
+        self.tail = 0  # next slot to write
+        self.event = asyncio.Event()
+        self.wake_pending = False
+
+    def qsize(self) -> int:
+        return self.tail - self.head
+
+    def full(self) -> bool:
+        return self.tail - self.head >= self.cap
+
+    def put_nowait(self, frame: Union[bytes, memoryview]):
+        if self.tail - self.head >= self.cap:
+            raise asyncio.QueueFull
+        self.buf[self.tail % self.cap] = frame
+        self.tail += 1
+        self.event.set()
+
+    def wake(self):
+        """Have the consumer's get() return WAKE (after any queued frames)."""
+        self.wake_pending = True
+        self.event.set()
+
+    async def get(self) -> Union[bytes, memoryview, object]:
+        # Nothing is consumed until the wait returns, so cancelling a pending get (e.g. wait_for timeout) loses no frame
+        while self.head == self.tail and not self.wake_pending:
+            self.event.clear()
+            await self.event.wait()
+        if self.head == self.tail:
+            self.wake_pending = False
+            return self.WAKE
+        i = self.head % self.cap
+        frame = self.buf[i]
+        self.buf[i] = None  # release the frame (a view keeps its whole received message alive)
+        self.head += 1
+        return frame
+
+    def clear(self):
+        for i in range(self.head, self.tail):
+            self.buf[i % self.cap] = None
+        self.head = self.tail
+        self.wake_pending = False
+
+
+@dataclass(slots=True, weakref_slot=True)  # weakref slot: app.sessions is a WeakValueDictionary
 class SessionState:
     """Per-session state for realtime voice tutoring"""
     session_id: str
     target_language: str = "en"
+    language_code: str = "en-US"  # STT/TTS code for target_language, kept in sync by set_target_language
     translator_mode: bool = False
     instructions: str = ""
     
     # Conversation history
-    conversation_history: List[Dict[str, Any]] = field(default_factory=list)
+    # Bounded: appends trim the oldest turns automatically
+    conversation_history: Deque[Dict[str, Any]] = field(default_factory=lambda: deque(maxlen=20))
+    # Last 10 turns already in Anthropic wire format, so each turn only copies the deque
+    anthropic_messages: Deque[Dict[str, Any]] = field(default_factory=lambda: deque(maxlen=10))
     uploaded_image: Optional[str] = None
+    uploaded_image_parts: Optional[tuple[str, str]] = None  # (mime_type, base64 data), parsed at upload
     
     # Audio processing
-    audio_queue: asyncio.Queue = field(default=None)
+    audio_ring: Optional[AudioRing] = None
     last_audio_time: Optional[float] = None
     silence_timeout_ms: int = 1200  # ms of silence before endpointing (less clipping on trailing words)
     
     # Async tasks
     stt_task: Optional[asyncio.Task] = None
-    llm_task: Optional[asyncio.Task] = None
+    llm_task: Optional[asyncio.Task] = None  # long-lived generation worker
+    turn_queue: Optional[asyncio.Queue] = None
+    turn_in_flight: bool = False
+    closed: bool = False
     tts_task: Optional[asyncio.Task] = None
     _stt_response_task: Optional[asyncio.Task] = None  # Internal STT response handler
     
     # Cancellation and barge-in
-    cancel_event: asyncio.Event = field(default_factory=asyncio.Event)
-    active_generation_cancel_event: Optional[asyncio.Event] = None
-    generation_id: int = 0  # Increment on each new generation to cancel old ones
+    generation_id: int = 0  # Epoch: bumped on each new turn/barge-in; stale work compares and exits
+    _gen_counter: Iterator[int] = field(default_factory=lambda: count(1), init=False, repr=False)  # next epoch value
     is_tts_playing: bool = False
     
     # STT streaming state
@@ -48,18 +121,24 @@ class SessionState:
     dropped_frames: int = 0
     
     def __post_init__(self):
-        """Initialize audio_queue with maxsize for real backpressure"""
-        if self.audio_queue is None:
-            self.audio_queue = asyncio.Queue(maxsize=self.max_queue_size)
+        """Initialize audio_ring with max_queue_size slots for real backpressure"""
+        if self.audio_ring is None:
+            self.audio_ring = AudioRing(self.max_queue_size)
+        self.language_code = _LANGUAGE_CODES.get(self.target_language, "en-US")
+    
+    def set_target_language(self, target_language: str):
+        """Switch the tutoring language and its STT/TTS language code together"""
+        self.target_language = target_language
+        self.language_code = _LANGUAGE_CODES.get(target_language, "en-US")
     
     def increment_generation_id(self) -> int:
         """Increment generation ID for cancellation tracking"""
-        self.generation_id += 1
+        self.generation_id = next(self._gen_counter)
         return self.generation_id
     
     def should_drop_frame(self) -> bool:
         """Check if we should drop frames due to backpressure"""
-        return self.audio_queue.qsize() >= self.max_queue_size
+        return self.audio_ring.full()
 
     def begin_turn(self, now_ts: float) -> int:
         self.current_turn_id += 1
@@ -67,33 +146,41 @@ class SessionState:
         self.turn_audio_bytes = 0
         return self.current_turn_id
     
-    def cleanup(self):
-        """Cleanup all tasks and resources"""
-        # Cancel all tasks
-        if self.stt_task and not self.stt_task.done():
-            self.stt_task.cancel()
-        if self._stt_response_task and not self._stt_response_task.done():
-            self._stt_response_task.cancel()
-        if self.llm_task and not self.llm_task.done():
+    def cancel_in_flight_turn(self):
+        """Interrupt the turn the generation worker is running, leaving the worker alive"""
+        if self.turn_in_flight and self.llm_task and not self.llm_task.done():
             self.llm_task.cancel()
-        if self.tts_task and not self.tts_task.done():
-            self.tts_task.cancel()
+
+    async def cleanup(self, timeout_s: float = 2.0):
+        """Cancel all tasks, wait for them to unwind, and release resources"""
+        self.closed = True
+        # Cancel all tasks
+        tasks = [
+            t for t in (self.stt_task, self._stt_response_task, self.llm_task, self.tts_task)
+            if t and not t.done()
+        ]
+        for t in tasks:
+            t.cancel()
         
-        # Set cancel event
-        self.cancel_event.set()
-        if self.active_generation_cancel_event:
-            self.active_generation_cancel_event.set()
+        # Invalidate any in-flight generation
+        self.increment_generation_id()
         
-        # Close STT stream if exists
+        # Wait once for every cancellation so sockets/streams are released before the session goes away.
+        # asyncio.wait (not wait_for) so a task that suppresses CancelledError can't stall teardown past timeout_s.
+        if tasks:
+            done, pending = await asyncio.wait(tasks, timeout=timeout_s)
+            for t in done:
+                if not t.cancelled():
+                    t.exception()  # mark retrieved: errors were already logged by the task itself
+            if pending:
+                logger.warning(f"Session {self.session_id}: {len(pending)} task(s) still running {timeout_s}s after cancel")
+        
+        # Close STT stream if exists (off the loop: the client close may block)
         if self.stt_stream:
             try:
-                self.stt_stream.close()
+                await asyncio.to_thread(self.stt_stream.close)
             except Exception as e:
-                print(f"Error closing STT stream: {e}")
+                logger.warning(f"Error closing STT stream: {e}")
         
-        # Clear queue
-        while not self.audio_queue.empty():
-            try:
-                self.audio_queue.get_nowait()
-            except asyncio.QueueEmpty:
-                break
+        # Clear queued audio
+        self.audio_ring.clear()
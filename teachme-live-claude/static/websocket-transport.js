@@ -121,17 +121,29 @@ class WebSocketTransport {
       return;
     }
     
+    // The server may coalesce several frames into one WebSocket message.
     const view = new DataView(buffer);
-    const messageType = view.getUint8(0);
-    const payloadLength = view.getUint32(1, false); // big-endian
-    
-    if (buffer.byteLength < 5 + payloadLength) {
-      console.error('Invalid binary message: payload length mismatch');
-      return;
+    let offset = 0;
+    while (offset < buffer.byteLength) {
+      if (buffer.byteLength - offset < 5) {
+        console.error('Invalid binary message: truncated frame header');
+        return;
+      }
+      const messageType = view.getUint8(offset);
+      const payloadLength = view.getUint32(offset + 1, false); // big-endian
+      const payloadStart = offset + 5;
+      
+      if (buffer.byteLength < payloadStart + payloadLength) {
+        console.error('Invalid binary message: payload length mismatch');
+        return;
+      }
+      
+      this._handleFrame(messageType, buffer.slice(payloadStart, payloadStart + payloadLength));
+      offset = payloadStart + payloadLength;
     }
-    
-    const payload = buffer.slice(5, 5 + payloadLength);
-    
+  }
+  
+  _handleFrame(messageType, payload) {
     switch (messageType) {
       case WebSocketTransport.SERVER_MESSAGE_TYPES.CONNECTED:
         const sessionId = this._decodeString(payload);
@@ -4,12 +4,72 @@
 import asyncio
 import queue as stdlib_queue
 import threading
+import time
+from collections import deque
 from typing import Callable, Optional, Awaitable
 from google.cloud import speech
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Raw protobuf class behind the proto-plus StreamingRecognizeRequest wrapper
+_REQUEST_PB = speech.StreamingRecognizeRequest.pb()
+_wrap_request = speech.StreamingRecognizeRequest.wrap
+_SPEECH_ACTIVITY_END = speech.StreamingRecognizeResponse.SpeechEventType.SPEECH_ACTIVITY_END
+
+
+# Longest a partial coalesced chunk waits for more frames before it is sent anyway
+_COALESCE_MAX_AGE_S = 0.04
+# A kept-open stream is rotated at an utterance boundary once this old (v1 streams end at ~305s)
+_STREAM_MAX_AGE_S = 240.0
+# ...or closed after this much idle time (v1 aborts a stream that receives no audio for ~10s)
+_STREAM_IDLE_CLOSE_S = 8.0
+
+
+def _audio_request(audio: bytes):
+    """Audio-only StreamingRecognizeRequest, built directly on the protobuf class
+
+    Skips proto-plus per-field marshalling; wrap() adopts the message without copying,
+    and serialization still sees a proto-plus instance (no coerce/deepcopy).
+    """
+    return _wrap_request(_REQUEST_PB(audio_content=audio))
+
+
+class _RequestQueue:
+    """Bounded handoff from the event loop (producer) to the STT generator thread (consumer)
+
+    A deque guarded by a single Condition; raises queue.Full / queue.Empty like queue.Queue
+    so callers keep the same error handling.
+    """
+    __slots__ = ("_items", "_cv", "maxsize")
+
+    def __init__(self, maxsize: int):
+        self._items = deque()
+        self._cv = threading.Condition()
+        self.maxsize = maxsize
+
+    def qsize(self) -> int:
+        return len(self._items)  # approximate without the lock; only used for logging
+
+    def put_nowait(self, item):
+        with self._cv:
+            if len(self._items) >= self.maxsize:
+                raise stdlib_queue.Full
+            self._items.append(item)
+            self._cv.notify()
+
+    def put(self, item):
+        """Enqueue regardless of capacity (the shutdown sentinel must never be dropped)"""
+        with self._cv:
+            self._items.append(item)
+            self._cv.notify()
+
+    def get(self, timeout: float):
+        with self._cv:
+            if not self._items and not self._cv.wait_for(lambda: self._items, timeout):
+                raise stdlib_queue.Empty
+            return self._items.popleft()
+
 
 class StreamingSTT:
     """Manages Google Cloud Speech-to-Text streaming recognition"""
@@ -29,18 +89,27 @@ class StreamingSTT:
         self.on_final = on_final
         self.stt_client = None
         self.stream = None
-        self.request_queue = stdlib_queue.Queue(maxsize=50)  # Limit queue size to prevent unbounded growth
+        self.request_queue = _RequestQueue(maxsize=50)  # Limit queue size to prevent unbounded growth
+        self._coalesce_target_bytes = int(sample_rate * 0.1) * 2  # ~100ms of LINEAR16 per STT request
         self.is_active = False
         self._stop_event = threading.Event()  # Dedicated STT stop event (only set on session shutdown)
-        self._stream_thread = None  # Thread that runs stream creation and iteration
+        self._stream_done = None  # Future the worker resolves when the current stream ends (None = no stream started)
+        self._cmd_queue = stdlib_queue.SimpleQueue()  # (request queue, done future) per stream; None stops the worker
+        self._worker = None  # Long-lived thread that runs stream creation and iteration
         self._event_loop = None  # Main event loop (set during initialize)
-        self._active_queue = None  # Queue that the active stream thread is reading from
-        self._stream_lock = threading.Lock()  # Lock for stream/queue operations
+        self._stream_started_at = 0.0  # monotonic time the live stream thread was started
+        self._final_since_audio = False  # set by the stream thread on is_final, cleared when audio is sent
+        # Stream-thread lifecycle, set from the thread via call_soon_threadsafe (close() sets both to release waiters)
+        self._thread_started = asyncio.Event()
+        self._thread_done = asyncio.Event()
+        # Transcript callbacks queued by the stream thread; one loop wakeup drains each batch
+        self._pending_callbacks = deque()
+        self._drain_scheduled = False
         
     def initialize(self, stt_client):
         """Initialize STT client and create streaming config (stream will start on first audio)"""
         self.stt_client = stt_client
-        self._event_loop = asyncio.get_event_loop()  # Store main event loop for callbacks from thread
+        self._event_loop = asyncio.get_running_loop()  # Store main event loop for callbacks from thread
         
         # Create streaming config (store for later use)
         config = speech.RecognitionConfig(
@@ -56,14 +125,69 @@ class StreamingSTT:
             config=config,
             interim_results=True,
             single_utterance=False,
+            enable_voice_activity_events=True,
         )
         
         self.is_active = True
         self.stream = None  # Will be created when first audio arrives
+        self._worker = threading.Thread(target=self._stream_worker_main, daemon=True, name="STT-stream-thread")
+        self._worker.start()
         logger.info(f"STT client initialized for session {self.session_state.session_id} (stream will start on first audio)")
     
+    def _send_audio(self, audio: bytes):
+        """Enqueue one coalesced audio chunk, dispatching a new stream to the worker if none is live"""
+        # Runs on the event loop, as does the queue swap in _close_and_restart_stream, so no lock:
+        # the live stream's generator holds its own queue and self.request_queue is always that one
+        # (or, right after a swap, the fresh queue the next stream will read).
+        target_q = self.request_queue
+        done = None
+        if self._stream_done is None or self._stream_done.done():
+            # No live stream: dispatch one pinned to the current request_queue.
+            done = self._stream_done = self._event_loop.create_future()
+            self._stream_started_at = time.monotonic()
+        
+        self._final_since_audio = False
+        if done is not None:
+            # Start new stream - enqueue chunk first so generator has something to yield immediately
+            logger.info("STT process_audio_queue: Dispatching stream to worker thread...")
+            try:
+                request = _audio_request(audio)
+                target_q.put_nowait(request)
+                logger.info(f"Added audio chunk to STT queue: {len(audio)} bytes")
+            except stdlib_queue.Full:
+                logger.error("STT request queue full on first chunk - this should not happen!")
+                return
+            except Exception as e:
+                logger.error(f"Error adding first chunk to STT queue: {e}", exc_info=True)
+                return
+            
+            # The worker creates the stream AND immediately iterates it.
+            self._cmd_queue.put((target_q, done))
+            logger.info("STT process_audio_queue: Stream dispatched")
+        else:
+            try:
+                request = _audio_request(audio)
+                target_q.put_nowait(request)
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Added audio chunk to STT queue: %d bytes", len(audio))
+            except stdlib_queue.Full:
+                logger.warning(f"STT request queue full, dropping chunk (queue size: {target_q.qsize()})")
+            except Exception as e:
+                logger.error(f"Error adding chunk to STT queue: {e}", exc_info=True)
+    
+    def _wake(self):
+        """Timer callback: nudge the audio consumer so it re-checks coalescing and silence deadlines"""
+        # A flag on the ring, not a queued marker: it can't be dropped when the ring is full
+        # and doesn't take a slot from real audio
+        self.session_state.audio_ring.wake()
+    
     async def process_audio_queue(self):
         """Process audio frames from queue and send to STT"""
+        loop = asyncio.get_running_loop()
+        ring = self.session_state.audio_ring
+        flush_timer = None  # fires when the partial chunk reaches _COALESCE_MAX_AGE_S
+        silence_timer = None  # fires when silence_timeout_ms may have elapsed since the last frame
+        idle_timer = None  # fires when a stream kept open across utterances has gone unused too long
         try:
             logger.info("STT audio processing started")
             
@@ -71,119 +195,96 @@ class StreamingSTT:
             first_frame_received = False
             frame_count = 0
             loop_count = 0
+            pending = bytearray()  # frames not yet sent to STT
+            pending_since = 0.0
             
             # Process audio queue and add to request queue
             # Note: Don't check cancel_event here - STT should continue processing even during barge-in
+            # Plain get(): deadlines are call_later timers that make get() return AudioRing.WAKE, not a wait_for per frame
             while True:
                 loop_count += 1
-                if loop_count % 100 == 0:  # Log every 100 iterations to show it's alive
-                    logger.debug(f"STT process_audio_queue: Loop iteration {loop_count}, audio_queue size: {self.session_state.audio_queue.qsize()}, request_queue size: {self.request_queue.qsize()}")
+                if loop_count % 100 == 0 and logger.isEnabledFor(logging.DEBUG):  # Log every 100 iterations to show it's alive
+                    logger.debug("STT process_audio_queue: Loop iteration %d", loop_count)
                 try:
-                    # Get audio frame with timeout
-                    timeout = 0.1
-                    if loop_count <= 5 or loop_count % 50 == 0:  # Log first 5 iterations and then every 50
-                        logger.debug(f"STT process_audio_queue: Waiting for frame (timeout={timeout}s, audio_queue_size={self.session_state.audio_queue.qsize()})")
-                    audio_frame = await asyncio.wait_for(
-                        self.session_state.audio_queue.get(),
-                        timeout=timeout
-                    )
+                    audio_frame = await ring.get()
+                    now = loop.time()
+                    
+                    if audio_frame is ring.WAKE:
+                        if pending and now - pending_since >= _COALESCE_MAX_AGE_S:
+                            flush_timer = None
+                            self._send_audio(bytes(pending))
+                            pending.clear()
+                        
+                        # Check for silence timeout (endpointing)
+                        if silence_timer is not None and silence_timer.when() <= now:
+                            silence_timer = None
+                            if self.session_state.last_audio_time:
+                                silence_s = now - self.session_state.last_audio_time
+                                timeout_s = self.session_state.silence_timeout_ms / 1000
+                                if silence_s >= timeout_s:
+                                    # Send any partial chunk, then endpoint the utterance
+                                    if pending:
+                                        if flush_timer is not None:
+                                            flush_timer.cancel()
+                                            flush_timer = None
+                                        self._send_audio(bytes(pending))
+                                        pending.clear()
+                                    logger.info(f"Silence timeout ({silence_s * 1000:.0f}ms) - utterance ended")
+                                    if not await self._finalize_utterance():
+                                        # Stream kept open: close it if the user stays quiet
+                                        idle_timer = loop.call_later(_STREAM_IDLE_CLOSE_S - timeout_s, self._wake)
+                                else:
+                                    # Audio arrived since the timer was set: re-arm for the remaining silence
+                                    silence_timer = loop.call_later(timeout_s - silence_s, self._wake)
+                        
+                        if idle_timer is not None and idle_timer.when() <= now:
+                            idle_timer = None
+                            logger.info("STT stream idle - closing until next audio")
+                            await self._close_and_restart_stream()
+                        continue
+                    
                     frame_count += 1
                     
                     # Check for sentinel BEFORE logging len() to avoid crash
                     if audio_frame is None:  # Sentinel for shutdown
                         logger.info("STT process_audio_queue: Received shutdown sentinel")
+                        if pending:
+                            self._send_audio(bytes(pending))
+                            pending.clear()
                         # Close active stream/thread even if self.stream is None
                         await self._close_and_restart_stream()
                         break
                     
-                    logger.info(f"STT process_audio_queue: Got frame #{frame_count} from queue: {len(audio_frame)} bytes")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("STT process_audio_queue: Got frame #%d from queue: %d bytes", frame_count, len(audio_frame))
                     
-                    # Atomically decide whether to start a new stream thread and pick target queue.
-                    # If stream is active, always target the pinned active queue.
-                    start_thread = False
-                    with self._stream_lock:
-                        if self._stream_thread is None or not self._stream_thread.is_alive():
-                            # No live stream thread: next utterance should use current request_queue.
-                            target_q = self.request_queue
-                            # Publish active queue immediately to avoid "thread alive but not pinned yet" gap.
-                            self._active_queue = target_q
-                            self._stream_thread = threading.Thread(
-                                target=self._start_stream_and_iterate,
-                                args=(target_q,),
-                                daemon=True,
-                                name="STT-stream-thread"
-                            )
-                            start_thread = True
-                        else:
-                            # Live stream thread: enqueue to active pinned queue.
-                            target_q = self._active_queue
-
-                            if target_q is None:
-                                # should never happen now
-                                logger.error("Invariant violated: stream thread alive but _active_queue is None")
-                                continue
+                    if idle_timer is not None:
+                        idle_timer.cancel()
+                        idle_timer = None
                     
                     if not first_frame_received:
                         logger.info("STT process_audio_queue: First frame received")
                         first_frame_received = True
                     
-                    if start_thread:
-                        # Start new stream - enqueue frame first so generator has something to yield immediately
-                        logger.info("STT process_audio_queue: Starting stream in dedicated thread...")
-                        try:
-                            request = speech.StreamingRecognizeRequest(audio_content=audio_frame)
-                            target_q.put_nowait(request)
-                            logger.info(f"Added audio frame to STT queue: {len(audio_frame)} bytes")
-                        except stdlib_queue.Full:
-                            logger.error("STT request queue full on first frame - this should not happen!")
-                            continue
-                        except Exception as e:
-                            logger.error(f"Error adding first frame to STT queue: {e}", exc_info=True)
-                            continue
-                        
-                        # Start stream in dedicated thread that creates stream AND immediately iterates it.
-                        # Thread object was assigned under lock to avoid races.
-                        self._stream_thread.start()
-                        logger.info("STT process_audio_queue: Stream thread started")
-                    else:
-                        try:
-                            request = speech.StreamingRecognizeRequest(audio_content=audio_frame)
-                            target_q.put_nowait(request)
-                            logger.debug(f"Added audio frame #{frame_count} to STT queue: {len(audio_frame)} bytes, queue size: {target_q.qsize()}")
-                        except stdlib_queue.Full:
-                            logger.warning(f"STT request queue full, dropping frame (queue size: {target_q.qsize()})")
-                        except Exception as e:
-                            logger.error(f"Error adding frame to STT queue: {e}", exc_info=True)
+                    # Coalesce frames into ~100ms requests; the age cap bounds the added latency
+                    if not pending:
+                        pending_since = now
+                        flush_timer = loop.call_later(_COALESCE_MAX_AGE_S, self._wake)
+                    pending.extend(audio_frame)
+                    if len(pending) >= self._coalesce_target_bytes or now - pending_since >= _COALESCE_MAX_AGE_S:
+                        if flush_timer is not None:
+                            flush_timer.cancel()
+                            flush_timer = None
+                        self._send_audio(bytes(pending))
+                        pending.clear()
                     
-                    # Update last audio time
-                    self.session_state.last_audio_time = asyncio.get_event_loop().time()
-                    logger.debug(f"Updated last_audio_time: {self.session_state.last_audio_time}")
+                    # Update last audio time; one silence timer per quiet period, re-armed lazily on wake
+                    self.session_state.last_audio_time = now
+                    if silence_timer is None:
+                        silence_timer = loop.call_later(self.session_state.silence_timeout_ms / 1000, self._wake)
                     
-                except asyncio.TimeoutError:
-                    # Timeout waiting for audio frame
-                    audio_queue_size = self.session_state.audio_queue.qsize()
-                    # Log timeout occasionally to show loop is running
-                    if loop_count % 20 == 0:
-                        logger.debug(f"STT process_audio_queue: Timeout (loop={loop_count}, audio_queue_size={audio_queue_size}, request_queue_size={self.request_queue.qsize()})")
-                    
-                    # Check for silence timeout (endpointing)
-                    if self.session_state.last_audio_time:
-                        silence_duration = (
-                            asyncio.get_event_loop().time() - 
-                            self.session_state.last_audio_time
-                        ) * 1000  # Convert to ms
-                        
-                        if silence_duration >= self.session_state.silence_timeout_ms:
-                            # Endpoint detected - close current stream and restart for next utterance
-                            logger.info(f"Silence timeout ({silence_duration:.0f}ms) - closing stream and restarting for next utterance")
-                            await self._close_and_restart_stream()
-                            self.session_state.last_audio_time = None
-                    
-                    continue
                 except Exception as e:
                     logger.error(f"Error processing audio frame: {e}", exc_info=True)
-                    import traceback
-                    logger.error(f"Traceback: {traceback.format_exc()}")
                     continue
         
         except asyncio.CancelledError:
@@ -191,9 +292,30 @@ class StreamingSTT:
         except Exception as e:
             logger.error(f"STT processing error: {e}", exc_info=True)
         finally:
+            for timer in (flush_timer, silence_timer, idle_timer):
+                if timer is not None:
+                    timer.cancel()
             self.is_active = False
             logger.info("STT audio processing stopped")
     
+    def _stream_worker_main(self):
+        """Worker thread: run each dispatched stream to completion, one at a time, until close()"""
+        while True:
+            cmd = self._cmd_queue.get()
+            if cmd is None:
+                break
+            q, done = cmd
+            try:
+                self._start_stream_and_iterate(q)
+            except Exception:
+                pass  # already logged; the next audio frame dispatches a fresh stream
+            finally:
+                try:
+                    self._event_loop.call_soon_threadsafe(done.set_result, None)
+                except RuntimeError:
+                    pass  # event loop already closed (process shutdown)
+        logger.info("STT worker thread exiting")
+    
     def _start_stream_and_iterate(self, q):
         """Start STT stream and immediately iterate responses in the same thread
         
@@ -202,10 +324,9 @@ class StreamingSTT:
         
         CRITICAL: Pin the queue in the generator closure so queue swapping doesn't redirect the generator.
         """
-        # CRITICAL: q is passed from process_audio_queue at thread creation time.
-        # This guarantees the thread pins the exact queue that received first frame.
-        with self._stream_lock:
-            self._active_queue = q  # Track the active queue for this stream thread
+        # CRITICAL: q is passed from _send_audio at dispatch time.
+        # This guarantees the stream pins the exact queue that received first frame.
+        self._signal(self._thread_started)
         
         # Note: We don't check if self.stream is not None here because:
         # 1. Thread gating (should_start_stream) already prevents multiple threads
@@ -222,8 +343,6 @@ class StreamingSTT:
             while self.is_active and not self._stop_event.is_set():
                 try:
                     # Wait for audio frame (short timeout to check stop event periodically)
-                    queue_size = q.qsize()
-                    logger.debug(f"STT generator: Waiting for frame (queue_size={queue_size})")
                     item = q.get(timeout=0.5)
                     # Internal shutdown sentinel: stop generator without yielding to Google STT.
                     # Sending audio_content=None to Google causes "Malordered Data Received".
@@ -232,13 +351,14 @@ class StreamingSTT:
                         break
                     req = item
                     frame_count += 1
-                    logger.info(f"STT generator: Got frame #{frame_count}, yielding to STT (size={len(req.audio_content)} bytes)")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("STT generator: Got frame #%d, yielding to STT (size=%d bytes)", frame_count, len(req.audio_content))
                     yield req
-                    logger.debug(f"STT generator yielded audio frame: {len(req.audio_content)} bytes")
                 except stdlib_queue.Empty:
                     # Timeout - just continue loop to check stop event
                     # Don't send empty audio - let STT naturally finalize
-                    logger.debug(f"STT generator: Timeout, checking stop event (frame_count={frame_count}, queue_size={q.qsize()})")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("STT generator: Timeout, checking stop event (frame_count=%d)", frame_count)
                     # Continue loop to check stop event
                     continue
             logger.info("STT generator: Exiting (stop event set or is_active=False)")
@@ -265,117 +385,135 @@ class StreamingSTT:
             if loop is None:
                 logger.error("Event loop not set - cannot schedule callbacks")
                 return
-            response_count = 0
+            stop_event = self._stop_event
             
             for response in self.stream:
                 # Check stop event (not cancel_event - STT must continue during barge-in)
-                if self._stop_event.is_set():
+                if stop_event.is_set():
                     logger.info("STT stream iteration stopped (stop event set)")
                     break
                 
-                response_count += 1
-                logger.debug(f"STT response #{response_count} received")
+                if response.speech_event_type == _SPEECH_ACTIVITY_END:
+                    logger.debug("STT speech activity end")
                 
-                if not response.results:
-                    logger.debug("STT response has no results")
+                results = response.results
+                if not results:
                     continue
                 
-                result = response.results[0]
-                if not result.alternatives:
-                    logger.debug("STT result has no alternatives")
+                result = results[0]
+                alts = result.alternatives
+                if not alts:
                     continue
                 
-                transcript = result.alternatives[0].transcript
-                confidence = float(getattr(result.alternatives[0], "confidence", 0.0) or 0.0)
-                is_final = getattr(result, "is_final", False)
+                alt = alts[0]
+                transcript = alt.transcript
                 
-                # Schedule callback in event loop
-                if is_final:
+                # Queue callback for the event loop
+                if result.is_final:
+                    self._final_since_audio = True
                     logger.info(f"STT Final: {transcript}")
                     if self.on_final:
-                        if asyncio.iscoroutinefunction(self.on_final):
-                            asyncio.run_coroutine_threadsafe(self.on_final(transcript, confidence), loop)
-                        else:
-                            loop.call_soon_threadsafe(self.on_final, transcript, confidence)
+                        self._post_callback(True, transcript, float(alt.confidence or 0.0))
                 else:
-                    logger.debug(f"STT Interim: {transcript}")
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug("STT Interim: %s", transcript)
                     if self.on_interim:
-                        if asyncio.iscoroutinefunction(self.on_interim):
-                            asyncio.run_coroutine_threadsafe(self.on_interim(transcript), loop)
-                        else:
-                            loop.call_soon_threadsafe(self.on_interim, transcript)
+                        self._post_callback(False, transcript, 0.0)
                             
         except Exception as e:
             logger.error(f"Error in streaming_recognize() or iteration: {e}", exc_info=True)
-            import traceback
-            logger.error(f"Full traceback: {traceback.format_exc()}")
             raise
         finally:
             logger.info("STT stream iteration ended")
-            # Clear active queue reference when thread exits
-            with self._stream_lock:
-                if self._active_queue == q:  # Only clear if this thread's queue
-                    self._active_queue = None
+            self._signal(self._thread_done)
     
-    async def _finalize_utterance(self):
-        """Finalize current utterance - close and restart stream for next utterance"""
+    async def _finalize_utterance(self) -> bool:
+        """Finalize current utterance; returns True if the stream was closed
+        
+        The stream stays open for the next utterance when Google has already returned a final
+        for everything sent. Otherwise closing is what makes it finalize the trailing audio, and
+        a stream near the v1 duration limit is rotated here rather than mid-utterance.
+        """
+        self.session_state.last_audio_time = None
+        live = self._stream_done is not None and not self._stream_done.done()
+        if live and self._final_since_audio and time.monotonic() - self._stream_started_at < _STREAM_MAX_AGE_S:
+            logger.debug("Finalizing utterance - final already received, keeping stream open")
+            return False
         logger.debug("Finalizing utterance - closing stream and restarting for next utterance")
         await self._close_and_restart_stream()
-        if self.session_state.last_audio_time:
-            self.session_state.last_audio_time = None
+        return True
     
     async def _close_and_restart_stream(self):
-        # Snapshot under lock + swap request queue for next utterance
-        with self._stream_lock:
-            t = self._stream_thread
-            old_queue = self._active_queue
+        done = self._stream_done
+        if done is None:
+            return  # no stream to close
 
-            if t is None:
-                return  # no stream to close
-
-            if t.is_alive() and old_queue is None:
-                logger.error("Invariant violated: stream thread alive but _active_queue is None")
-                return
-
-            if old_queue is None:
-                old_queue = self.request_queue
-
-            # swap queue for next utterance ONCE
-            self.request_queue = stdlib_queue.Queue(maxsize=50)
+        # Swap in a fresh queue for the next utterance; the generator keeps reading the old one
+        old_queue = self.request_queue
+        self.request_queue = _RequestQueue(maxsize=50)
 
         logger.info("Closing STT stream for utterance end")
 
         # Send sentinel to end current request generator (never send to Google)
         try:
-            old_queue.put_nowait(None)
+            old_queue.put(None)
             logger.debug("Sentinel sent to active stream queue")
-        except stdlib_queue.Full:
-            try:
-                old_queue.put(None)
-                logger.debug("Sentinel sent to active stream queue (blocking)")
-            except Exception as e:
-                logger.warning(f"Error sending sentinel (blocking): {e}")
         except Exception as e:
             logger.warning(f"Error sending sentinel: {e}")
 
-        # Wait for thread to exit
-        if t.is_alive():
-            logger.debug("Waiting for stream thread to exit...")
-            for _ in range(30):
-                if not t.is_alive():
-                    break
-                await asyncio.sleep(0.1)
+        # Wait (bounded) for the worker to finish the stream; shield keeps the future for later liveness checks
+        if not done.done():
+            logger.debug("Waiting for stream to end...")
+            try:
+                await asyncio.wait_for(asyncio.shield(done), timeout=3.0)
+            except asyncio.TimeoutError:
+                logger.warning("STT stream did not end within 3s of the sentinel")
 
-        # Clear state only when thread is dead
-        with self._stream_lock:
-            self.stream = None
-            if not t.is_alive():
-                self._stream_thread = None
-                self._active_queue = None
+        # Clear state only when the stream has ended
+        self.stream = None
+        if done.done():
+            self._stream_done = None
 
         logger.info("STT stream closed - will restart on next audio frame with fresh queue")
 
     
+    def _post_callback(self, is_final: bool, transcript: str, confidence: float):
+        """Queue a transcript callback from the stream thread; wakes the loop only if no drain is pending"""
+        self._pending_callbacks.append((is_final, transcript, confidence))
+        if not self._drain_scheduled:
+            self._drain_scheduled = True
+            try:
+                self._event_loop.call_soon_threadsafe(self._drain_callbacks)
+            except RuntimeError:
+                pass  # event loop already closed (process shutdown)
+    
+    def _drain_callbacks(self):
+        """Dispatch every queued transcript callback in order (runs on the event loop)"""
+        # Clear the flag before draining so an append racing with the drain schedules another one
+        self._drain_scheduled = False
+        pending = self._pending_callbacks
+        while pending:
+            is_final, transcript, confidence = pending.popleft()
+            try:
+                if is_final:
+                    result = self.on_final(transcript, confidence)
+                else:
+                    result = self.on_interim(transcript)
+                if asyncio.iscoroutine(result):
+                    asyncio.ensure_future(result)
+            except Exception as e:
+                logger.error(f"Error in STT transcript callback: {e}", exc_info=True)
+    
+    def _signal(self, event: asyncio.Event):
+        """Set an asyncio.Event from the stream thread"""
+        loop = self._event_loop
+        if loop is None:
+            return
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            pass  # event loop already closed (process shutdown)
+    
     async def handle_responses(self):
         """Handle STT streaming responses
         
@@ -387,41 +525,22 @@ class StreamingSTT:
             
             # Wait for stream thread to start (stream is created and iterated in that thread)
             max_wait_time = 30.0  # seconds
-            wait_start = asyncio.get_event_loop().time()
-            
-            while (self._stream_thread is None or not self._stream_thread.is_alive()) and not self._stop_event.is_set():
-                elapsed = asyncio.get_event_loop().time() - wait_start
-                if elapsed >= max_wait_time:
-                    logger.warning(f"STT stream creation timeout after {elapsed:.1f}s")
-                    break
-                
-                # Log progress every 5 seconds
-                if elapsed > 0 and int(elapsed) % 5 == 0:
-                    logger.debug(f"STT response handler: Waiting for stream thread ({elapsed:.1f}s elapsed)")
-                
-                await asyncio.sleep(0.1)
+            try:
+                await asyncio.wait_for(self._thread_started.wait(), timeout=max_wait_time)
+            except asyncio.TimeoutError:
+                logger.warning(f"STT stream creation timeout after {max_wait_time:.1f}s")
             
-            # Check if stream thread was created
-            if self._stream_thread and self._stream_thread.is_alive():
-                elapsed = asyncio.get_event_loop().time() - wait_start
-                logger.info(f"STT stream thread detected after {elapsed:.1f}s wait")
-            else:
-                # Only warn if stream wasn't created (and we weren't stopped)
-                if not self._stop_event.is_set():
-                    logger.warning("STT stream thread was never created")
-                else:
-                    logger.debug("STT stream thread was never created (stop event set)")
+            # close() also sets _thread_started, so check the stop event first
+            if self._stop_event.is_set():
+                logger.debug("STT response handler: stop event set")
+                return
+            if not self._thread_started.is_set():
+                logger.warning("STT stream thread was never created")
                 return
             
             # Wait for stream thread to complete (it handles all response processing)
             logger.info("STT response handler: Waiting for stream thread to complete")
-            # Pin thread reference locally to avoid races when _stream_thread is reset elsewhere.
-            t = self._stream_thread
-            if t is None:
-                return
-            # Thread will exit when stream ends or stop_event is set
-            while t.is_alive() and self.is_active and not self._stop_event.is_set():
-                await asyncio.sleep(1.0)
+            await self._thread_done.wait()
         
         except Exception as e:
             logger.error(f"Error handling STT responses: {e}")
@@ -437,25 +556,19 @@ class StreamingSTT:
         # Set stop event to signal shutdown to all STT components
         self._stop_event.set()
         self.is_active = False
+        # Release handle_responses whichever phase it is waiting in
+        self._thread_started.set()
+        self._thread_done.set()
         
-        # Signal shutdown to the active queue (the one the generator is reading from)
+        # Signal shutdown to the queue the generator is reading from
         # This works even if self.stream is None
-        with self._stream_lock:
-            q = self._active_queue or self.request_queue
+        try:
+            self.request_queue.put(None)
+            logger.debug("STT shutdown sentinel sent to request queue")
+        except Exception as e:
+            logger.warning(f"Error sending shutdown sentinel: {e}")
         
-        if q:
-            try:
-                q.put_nowait(None)
-                logger.debug("STT shutdown sentinel sent to active queue")
-            except stdlib_queue.Full:
-                try:
-                    q.put(None)
-                    logger.debug("STT shutdown sentinel sent to active queue (blocking)")
-                except Exception as e:
-                    logger.warning(f"Error sending shutdown sentinel (blocking): {e}")
-            except Exception as e:
-                logger.warning(f"Error sending shutdown sentinel: {e}")
+        # Stop the worker once its current stream (if any) has ended
+        self._cmd_queue.put(None)
         
-        # Reset stream state under lock for consistency
-        with self._stream_lock:
-            self.stream = None
+        self.stream = None
@@ -0,0 +1,73 @@
+import re
+
+from agent.runtime import AnswerSentenceStream, parse_structured_json
+
+_OBJ = '{"answer":"a","steps":[],"examples":[],"common_mistakes":[],"next_exercises":[]}'
+
+
+def test_parse_structured_json_bare_object():
+    parsed = parse_structured_json(_OBJ)
+    assert parsed is not None
+    assert parsed["answer"] == "a"
+
+
+def test_parse_structured_json_recovers_list_wrapped_object():
+    parsed = parse_structured_json(f"[{_OBJ}]")
+    assert parsed is not None
+    assert parsed["answer"] == "a"
+
+
+def test_parse_structured_json_recovers_object_after_prose():
+    parsed = parse_structured_json(f"Here you go:\n```json\n{_OBJ}\n```")
+    assert parsed is not None
+    assert parsed["answer"] == "a"
+
+
+def test_parse_structured_json_rejects_missing_keys():
+    assert parse_structured_json('{"answer":"a"}') is None
+    assert parse_structured_json("[]") is None
+
+
+# "answer" is not the first key, and earlier values mention "answer" to check they are skipped.
+_STREAMED = (
+    '{"steps":["answer"],"meta":{"answer":"no"},'
+    '"answer":"Say \\"hi\\" first. Smile \\uD83D\\uDE00 now! 끝났어요。 Line\\nbreak? Done.",'
+    '"examples":[],"common_mistakes":[],"next_exercises":[]}'
+)
+_SENTENCES = ['Say "hi" first.', "Smile \U0001F600 now!", "끝났어요。", "Line\nbreak?", "Done."]
+
+
+def _feed(chunks):
+    stream = AnswerSentenceStream()
+    sentences = []
+    for chunk in chunks:
+        sentences.extend(stream.feed(chunk))
+    return stream, sentences
+
+
+def _assert_matches_parsed(stream, sentences):
+    answer = parse_structured_json(_STREAMED)["answer"]
+    assert stream.done
+    assert stream.answer == answer
+    assert sentences == _SENTENCES
+    assert re.sub(r"\s", "", "".join(sentences)) == re.sub(r"\s", "", answer)
+
+
+def test_answer_sentence_stream_whole_payload():
+    _assert_matches_parsed(*_feed([_STREAMED]))
+
+
+def test_answer_sentence_stream_one_char_per_chunk():
+    _assert_matches_parsed(*_feed(list(_STREAMED)))
+
+
+def test_answer_sentence_stream_every_two_chunk_split():
+    # Covers splits inside \", inside each half of the surrogate pair, and around each terminator.
+    for i in range(len(_STREAMED) + 1):
+        _assert_matches_parsed(*_feed([_STREAMED[:i], _STREAMED[i:]]))
+
+
+def test_answer_sentence_stream_split_inside_surrogate_pair():
+    high = _STREAMED.index("\\uD83D")
+    chunks = [_STREAMED[: high + 3], _STREAMED[high + 3 : high + 8], _STREAMED[high + 8 :]]
+    _assert_matches_parsed(*_feed(chunks))
@@ -0,0 +1,37 @@
+import pytest
+
+from app.tools.registry import (
+    EXPRESSION_MAX_LENGTH,
+    GRAMMAR_TEXT_MAX_LENGTH,
+    MathSolverArgs,
+    GrammarCheckArgs,
+    execute_tool,
+)
+
+
+def test_schema_bounds_match_runtime_bounds():
+    assert MathSolverArgs.model_json_schema()["properties"]["expression"]["maxLength"] == EXPRESSION_MAX_LENGTH
+    assert GrammarCheckArgs.model_json_schema()["properties"]["text"]["maxLength"] == GRAMMAR_TEXT_MAX_LENGTH
+
+
+def test_math_solver_accepts_max_length_expression():
+    expression = "1+" * ((EXPRESSION_MAX_LENGTH - 1) // 2) + "1"
+    assert len(expression) <= EXPRESSION_MAX_LENGTH
+    assert "result" in execute_tool("math_solver", {"expression": expression})
+
+
+@pytest.mark.parametrize("expression", ["", "1" * (EXPRESSION_MAX_LENGTH + 1)])
+def test_math_solver_rejects_out_of_bounds_expression(expression):
+    with pytest.raises(ValueError):
+        execute_tool("math_solver", {"expression": expression})
+
+
+@pytest.mark.parametrize("text", ["", "a" * (GRAMMAR_TEXT_MAX_LENGTH + 1)])
+def test_grammar_check_rejects_out_of_bounds_text(text):
+    with pytest.raises(ValueError):
+        execute_tool("grammar_check", {"text": text})
+
+
+def test_rejects_non_string_argument():
+    with pytest.raises(ValueError):
+        execute_tool("math_solver", {"expression": 42})
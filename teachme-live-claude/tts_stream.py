@@ -2,32 +2,190 @@
 # Streaming Text-to-Speech implementation
 
 import asyncio
-from typing import Callable, Optional, Awaitable
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Awaitable, Union
 from google.cloud import texttospeech
 import logging
 
 logger = logging.getLogger(__name__)
 
+# StreamingSynthesize only serves Chirp 3 HD voices; output is raw LINEAR16 PCM at 24kHz
+_STREAMING_VOICES = {"ko": "ko-KR-Chirp3-HD-Aoede", "en": "en-US-Chirp3-HD-Aoede"}
+
+# Dedicated pool for blocking TTS RPCs (stream iteration and full synthesis) so concurrent sessions
+# queue here instead of drawing on the loop's default executor
+_TTS_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="tts")
+
+# Per-language protos that never change between utterances (StreamingTTS is created per utterance)
+_VOICE_CONFIGS: dict = {}  # language_code -> (VoiceSelectionParams, AudioConfig) for full synthesis
+_STREAMING_CONFIG_REQUESTS: dict = {}  # language_code -> config-only StreamingSynthesizeRequest
+
+
+def _cancel_rpc(responses) -> None:
+    """Tear down a streaming RPC; safe from any thread and on an already-finished call"""
+    cancel = getattr(responses, "cancel", None)
+    if cancel:
+        cancel()
+
+
+def _voice_config(language_code: str):
+    """Voice and audio config for full synthesis, built once per language"""
+    cached = _VOICE_CONFIGS.get(language_code)
+    if cached is None:
+        if language_code.startswith("ko"):
+            voice_name = "ko-KR-Standard-A"
+        else:
+            voice_name = "en-US-Neural2-F"
+        voice = texttospeech.VoiceSelectionParams(
+            language_code=language_code,
+            name=voice_name,
+            ssml_gender=texttospeech.SsmlVoiceGender.FEMALE,
+        )
+        audio_config = texttospeech.AudioConfig(
+            audio_encoding=texttospeech.AudioEncoding.LINEAR16,  # PCM16 for streaming
+            sample_rate_hertz=24000,  # Standard TTS sample rate
+            speaking_rate=1.0,
+            pitch=0.0,
+        )
+        cached = _VOICE_CONFIGS[language_code] = (voice, audio_config)
+    return cached
+
 
 class StreamingTTS:
     """Manages Google Cloud Text-to-Speech with chunked streaming"""
     
+    # Cleared once the installed SDK turns out to lack StreamingSynthesize, so later utterances skip the attempt
+    streaming_supported = True
+    
     def __init__(
         self,
         tts_client: texttospeech.TextToSpeechClient,
-        on_audio_chunk: Optional[Callable[[bytes], Awaitable[None]]] = None,
+        on_audio_chunk: Optional[Callable[[Union[bytes, memoryview]], Awaitable[None]]] = None,
         on_complete: Optional[Callable[[], Awaitable[None]]] = None,
+        chunk_size: int = 4800 * 2,  # ~200ms of 16-bit PCM at 24kHz
     ):
         self.tts_client = tts_client
         self.on_audio_chunk = on_audio_chunk
         self.on_complete = on_complete
-        self.chunk_size = 4800 * 2  # ~200ms of 16-bit PCM at 24kHz
+        # Whole PCM16 samples per chunk: the client wraps each chunk in an Int16Array
+        self.chunk_size = max(2, chunk_size - chunk_size % 2)
+        # Resolved once; _emit_* run per audio chunk
+        self._on_audio_chunk_is_coro = asyncio.iscoroutinefunction(on_audio_chunk) if on_audio_chunk else False
+        self._on_complete_is_coro = asyncio.iscoroutinefunction(on_complete) if on_complete else False
+    
+    async def _emit_chunk(self, chunk: Union[bytes, memoryview]):
+        if self.on_audio_chunk:
+            if self._on_audio_chunk_is_coro:
+                await self.on_audio_chunk(chunk)
+            else:
+                self.on_audio_chunk(chunk)
+    
+    async def _emit_complete(self):
+        if self.on_complete:
+            if self._on_complete_is_coro:
+                await self.on_complete()
+            else:
+                self.on_complete()
+    
+    def _iterate_stream(
+        self,
+        requests,
+        loop: asyncio.AbstractEventLoop,
+        out: asyncio.Queue,
+        stop: threading.Event,
+        rpc: list,
+    ):
+        """Blocking gRPC iteration (executor thread): hand each audio chunk to the loop as it arrives"""
+        try:
+            responses = self.tts_client.streaming_synthesize(requests=requests)
+            # Published before checking stop, so either this thread or the canceller sees the other
+            rpc.append(responses)
+            if stop.is_set():
+                _cancel_rpc(responses)
+                return
+            for response in responses:
+                if stop.is_set():
+                    _cancel_rpc(responses)
+                    break
+                loop.call_soon_threadsafe(out.put_nowait, response.audio_content)
+        except Exception as e:
+            loop.call_soon_threadsafe(out.put_nowait, e)
+        finally:
+            loop.call_soon_threadsafe(out.put_nowait, None)
+    
+    async def _stream_synthesis(
+        self,
+        text: str,
+        language_code: str,
+        is_cancelled: Optional[Callable[[], bool]],
+    ) -> Optional[int]:
+        """
+        Forward StreamingSynthesize audio chunks as the server produces them
+        
+        Returns bytes forwarded, or None if streaming failed before any audio
+        (e.g. voice/SDK without streaming support) so the caller can fall back.
+        SSML is not accepted in streaming mode; input is plain text only.
+        """
+        try:
+            config_request = _STREAMING_CONFIG_REQUESTS.get(language_code)
+            if config_request is None:
+                voice = texttospeech.VoiceSelectionParams(
+                    language_code=language_code,
+                    name=_STREAMING_VOICES["ko" if language_code.startswith("ko") else "en"],
+                )
+                config_request = _STREAMING_CONFIG_REQUESTS[language_code] = texttospeech.StreamingSynthesizeRequest(
+                    streaming_config=texttospeech.StreamingSynthesizeConfig(voice=voice)
+                )
+            requests = (
+                config_request,
+                texttospeech.StreamingSynthesizeRequest(
+                    input=texttospeech.StreamingSynthesisInput(text=text)
+                ),
+            )
+        except AttributeError as e:
+            # Installed SDK predates the streaming types
+            StreamingTTS.streaming_supported = False
+            logger.warning(f"Streaming TTS unavailable, using full synthesis: {e}")
+            return None
+        loop = asyncio.get_running_loop()
+        out: asyncio.Queue = asyncio.Queue()
+        stop = threading.Event()
+        rpc: list = []
+        loop.run_in_executor(_TTS_EXECUTOR, self._iterate_stream, requests, loop, out, stop, rpc)
+        
+        total = 0
+        try:
+            while True:
+                item = await out.get()
+                if item is None:
+                    break
+                if isinstance(item, Exception):
+                    if total == 0:
+                        if isinstance(item, AttributeError):
+                            StreamingTTS.streaming_supported = False
+                        logger.warning(f"Streaming TTS unavailable, using full synthesis: {item}")
+                        return None
+                    raise item
+                # Server pacing is the backpressure: no artificial delay between chunks
+                if is_cancelled and is_cancelled():
+                    logger.info("TTS cancelled during streaming")
+                    break
+                total += len(item)
+                await self._emit_chunk(item)
+        finally:
+            # Cancel the RPC now rather than when its next response arrives, so a
+            # barged-in utterance doesn't hold an executor thread blocked in next()
+            stop.set()
+            for responses in rpc:
+                _cancel_rpc(responses)
+        return total
     
     async def synthesize_and_stream(
         self,
         text: str,
         language_code: str = "en-US",
-        cancel_event: Optional[asyncio.Event] = None,
+        is_cancelled: Optional[Callable[[], bool]] = None,
     ):
         """
         Synthesize speech and stream in chunks
@@ -35,77 +193,60 @@ class StreamingTTS:
         Args:
             text: Text to synthesize
             language_code: Language code (e.g., "en-US", "ko-KR")
-            cancel_event: Event to check for cancellation
+            is_cancelled: Returns True once this utterance is stale (e.g. after barge-in)
         """
         try:
-            # Select voice
-            if language_code.startswith("ko"):
-                voice_name = "ko-KR-Standard-A"
-                ssml_gender = texttospeech.SsmlVoiceGender.FEMALE
-            else:
-                voice_name = "en-US-Neural2-F"
-                ssml_gender = texttospeech.SsmlVoiceGender.FEMALE
-            
-            # Configure synthesis - use LINEAR16 for low-latency streaming
-            synthesis_input = texttospeech.SynthesisInput(text=text)
-            voice = texttospeech.VoiceSelectionParams(
-                language_code=language_code,
-                name=voice_name,
-                ssml_gender=ssml_gender,
-            )
-            audio_config = texttospeech.AudioConfig(
-                audio_encoding=texttospeech.AudioEncoding.LINEAR16,  # PCM16 for streaming
-                sample_rate_hertz=24000,  # Standard TTS sample rate
-                speaking_rate=1.0,
-                pitch=0.0,
-            )
-            
             # Check cancellation before API call
-            if cancel_event and cancel_event.is_set():
+            if is_cancelled and is_cancelled():
                 logger.info("TTS cancelled before synthesis")
                 return
             
-            # Synthesize (run in thread pool)
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: self.tts_client.synthesize_speech(
-                    input=synthesis_input,
-                    voice=voice,
-                    audio_config=audio_config
-                )
+            # Streaming first: audio starts after the first synthesized chunk, not the whole utterance
+            streamed_bytes = (
+                await self._stream_synthesis(text, language_code, is_cancelled)
+                if self.streaming_supported
+                else None
             )
+            if streamed_bytes is not None:
+                if is_cancelled and is_cancelled():
+                    return
+                await self._emit_complete()
+                logger.info(f"TTS streaming complete: {streamed_bytes} bytes")
+                return
+            
+            # Fallback: synthesize the full utterance (run in the TTS pool), then chunk it
+            voice, audio_config = _voice_config(language_code)
+            request = texttospeech.SynthesizeSpeechRequest(
+                input=texttospeech.SynthesisInput(text=text),
+                voice=voice,
+                audio_config=audio_config,
+            )
+            loop = asyncio.get_running_loop()
+            response = await loop.run_in_executor(_TTS_EXECUTOR, self.tts_client.synthesize_speech, request)
             
             # Check cancellation after synthesis
-            if cancel_event and cancel_event.is_set():
+            if is_cancelled and is_cancelled():
                 logger.info("TTS cancelled after synthesis")
                 return
             
             audio_data = response.audio_content
+            # Zero-copy slices: on_audio_chunk receives memoryviews into audio_content, so it must
+            # consume each chunk before returning (the frame encoder copies it into the message)
+            audio_view = memoryview(audio_data)
             
             # Stream in chunks
             for i in range(0, len(audio_data), self.chunk_size):
                 # Check cancellation before each chunk
-                if cancel_event and cancel_event.is_set():
+                if is_cancelled and is_cancelled():
                     logger.info("TTS cancelled during streaming")
                     return
                 
-                chunk = audio_data[i:i + self.chunk_size]
-                
-                if self.on_audio_chunk:
-                    if asyncio.iscoroutinefunction(self.on_audio_chunk):
-                        await self.on_audio_chunk(chunk)
-                    else:
-                        self.on_audio_chunk(chunk)
+                chunk = audio_view[i:i + self.chunk_size]
                 
-                # Small delay to prevent overwhelming the client
-                await asyncio.sleep(0.01)
+                # No fixed inter-chunk delay: awaiting the async callback is the pacing
+                await self._emit_chunk(chunk)
             
-            if self.on_complete:
-                if asyncio.iscoroutinefunction(self.on_complete):
-                    await self.on_complete()
-                else:
-                    self.on_complete()
+            await self._emit_complete()
             
             logger.info(f"TTS streaming complete: {len(audio_data)} bytes")
         
@@ -3,11 +3,45 @@
 
 import struct
 import json
-from typing import Tuple, Optional
+from typing import List, Tuple, Optional, Union
 import logging
 
+try:
+    import orjson
+
+    _json_loads = orjson.loads
+
+    def _json_dumps(data: dict) -> bytes:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+
+except ImportError:  # pragma: no cover - optional speedup
+    def _json_loads(payload: Union[bytes, memoryview, str]):
+        if isinstance(payload, memoryview):
+            payload = payload.tobytes()  # json.loads takes str/bytes only
+        return json.loads(payload)
+
+    def _json_dumps(data: dict) -> bytes:
+        # Same bytes orjson would produce: compact separators, UTF-8 without escaping non-ASCII
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode('utf-8')
+
 logger = logging.getLogger(__name__)
 
+# Frame header: message type (uint8) + payload length (big-endian uint32). Struct packs/unpacks
+# in C already; a dedicated extension would only trim call overhead (~0.1us per frame)
+_HDR = struct.Struct('>BI')
+
+
+class IncompleteFrame(ValueError):
+    """Buffer ends before the frame's header or declared payload does
+
+    Raised bare (no per-raise message formatting); a ValueError so existing
+    "invalid message" handling still applies.
+    """
+    __slots__ = ()
+
+    def __str__(self):
+        return "Incomplete frame"
+
 
 class WebSocketProtocol:
     """Binary WebSocket protocol handler"""
@@ -35,51 +69,79 @@ class WebSocketProtocol:
     LLM_DELTA = 0x19
     
     @staticmethod
-    def parse_message(buffer: bytes) -> Tuple[int, bytes]:
+    def parse_message(buffer: bytes, *, zero_copy: bool = False) -> Tuple[int, Union[bytes, memoryview]]:
         """
         Parse binary WebSocket message
         
+        Args:
+            buffer: Received frame
+            zero_copy: Return the payload as a memoryview into buffer instead of a copy. The view
+                keeps buffer alive; only use it when buffer is not reused (e.g. an immutable bytes frame)
+        
         Returns:
             (message_type, payload)
         """
         if len(buffer) < 5:
-            raise ValueError("Message too short")
+            raise IncompleteFrame
         
-        msg_type = buffer[0]
-        payload_len = struct.unpack('>I', buffer[1:5])[0]  # big-endian uint32
+        msg_type, payload_len = _HDR.unpack_from(buffer, 0)
+        end = 5 + payload_len
         
-        if len(buffer) < 5 + payload_len:
-            raise ValueError(f"Payload length mismatch: expected {payload_len}, got {len(buffer) - 5}")
+        if len(buffer) < end:
+            raise IncompleteFrame
         
-        payload = buffer[5:5 + payload_len]
-        return msg_type, payload
+        if zero_copy:
+            return msg_type, memoryview(buffer)[5:end]
+        return msg_type, buffer[5:end]
+    
+    @staticmethod
+    def parse_message_stream(buffer: Union[bytes, bytearray, memoryview]) -> Tuple[List[Tuple[int, memoryview]], int]:
+        """
+        Parse every complete frame in a buffer of back-to-back frames
+        
+        Returns:
+            ([(message_type, payload view), ...], bytes consumed) - an incomplete trailing frame is
+            left unconsumed so the caller can keep it and append the next read
+        
+        Each WebSocket message from the browser client carries exactly one frame, so the receive
+        loop uses parse_message; this serves byte streams that concatenate frames.
+        """
+        mv = memoryview(buffer)
+        size = len(mv)
+        frames = []
+        off = 0
+        while off + 5 <= size:
+            msg_type, payload_len = _HDR.unpack_from(mv, off)
+            end = off + 5 + payload_len
+            if end > size:
+                break
+            frames.append((msg_type, mv[off + 5:end]))
+            off = end
+        return frames, off
     
     @staticmethod
-    def encode_message(msg_type: int, payload: bytes) -> bytes:
+    def encode_message(msg_type: int, payload: Union[bytes, bytearray, memoryview]) -> bytes:
         """
         Encode binary WebSocket message
         
         Args:
             msg_type: Message type byte
-            payload: Payload bytes
+            payload: Payload bytes (any byte-format bytes-like object, e.g. a memoryview slice).
+                Callers encode text once at their boundary; a str fails the concat with TypeError
         
         Returns:
             Encoded message bytes
         """
-        payload_bytes = payload if isinstance(payload, bytes) else payload.encode('utf-8')
-        buffer = bytearray(5 + len(payload_bytes))
-        buffer[0] = msg_type
-        struct.pack_into('>I', buffer, 1, len(payload_bytes))  # big-endian
-        buffer[5:] = payload_bytes
-        return bytes(buffer)
+        # bytes + any bytes-like object: one allocation, one payload copy. A reused scratch
+        # bytearray measured ~3x slower (60B-48KB payloads): it still needs a copy out to bytes
+        return _HDR.pack(msg_type, len(payload)) + payload
     
     @staticmethod
     def encode_json_message(msg_type: int, data: dict) -> bytes:
         """Encode JSON message"""
-        payload = json.dumps(data).encode('utf-8')
-        return WebSocketProtocol.encode_message(msg_type, payload)
+        return WebSocketProtocol.encode_message(msg_type, _json_dumps(data))
     
     @staticmethod
-    def decode_json_payload(payload: bytes) -> dict:
-        """Decode JSON payload"""
-        return json.loads(payload.decode('utf-8'))
+    def decode_json_payload(payload: Union[bytes, memoryview, str]) -> dict:
+        """Decode JSON payload (binary frame payload or legacy text message)"""
+        return _json_loads(payload)